@@ -0,0 +1,763 @@
+import math
+import json
+import html
+
+from offline import register_script
+from minify import minify_html
+
+
+# 文档的中间表示(Block)、页面模板和各个格式的渲染器
+# 只依赖标准库，不需要python-docx和lxml，只提取大纲的工具可以单独使用
+
+
+# 页面模板：标题之前的部分
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>"""
+
+# 页面模板：标题之后到正文开始的部分（样式、侧边栏）
+HTML_BODY_START = """</title>
+    <style>
+        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
+        
+        body {
+            font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
+            line-height: 1.6;
+            color: #333;
+            background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
+            min-height: 100vh;
+            padding: 20px;
+        }
+        
+        .container {
+            display: flex;
+            max-width: 1400px;
+            margin: 0 auto;
+            gap: 30px;
+        }
+        
+        header {
+            text-align: center;
+            margin-bottom: 40px;
+            padding: 20px;
+            background: rgba(255, 255, 255, 0.8);
+            border-radius: 12px;
+            box-shadow: 0 4px 15px rgba(0, 0, 0, 0.1);
+        }
+
+        blockquote {
+            padding-left: 45px;
+        }
+        
+        h1 {
+            font-size: 2.8rem;
+            margin-bottom: 10px;
+            color: #2c3e50;
+            background: linear-gradient(90deg, #3498db, #8e44ad);
+            -webkit-background-clip: text;
+            background-clip: text;
+            color: transparent;
+        }
+        h2 {
+            font-size: 2rem;
+            margin-bottom: 20px;
+            padding-bottom: 10px;
+            border-bottom: 2px solid #3498db;
+            color: #2c3e50;
+        }
+        
+        h3 {
+            font-size: 1.6rem;
+            margin: 25px 0 15px;
+            color: #2050aa;
+        }
+        
+        h4 {
+            font-size: 1.3rem;
+            margin: 20px 0 12px;
+            color: #9b59b6;
+        }
+        
+        h5 {
+            font-size: 1.1rem;
+            margin: 18px 0 10px;
+            color: #e67e22;
+        }
+        
+        h6 {
+            font-size: 1rem;
+            margin: 16px 0 8px;
+            color: #e74c3c;
+        }
+        
+        p {
+            margin-bottom: 15px;
+            font-size: 1.05rem;
+            color: #555;
+            line-height: 1.7;
+        }
+
+
+        .subtitle {
+            font-size: 1.2rem;
+            color: #7f8c8d;
+            max-width: 800px;
+            margin: 0 auto;
+        }
+        
+        /* 侧边栏样式 */
+        .sidebar {
+            flex: 0 0 280px;
+            background: rgba(255, 255, 255, 0.95);
+            border-radius: 12px;
+            padding: 25px 20px;
+            box-shadow: 0 8px 30px rgba(0, 0, 0, 0.12);
+            height: fit-content;
+            position: sticky;
+            top: 20px;
+            max-height: 90vh;
+            overflow-y: auto;
+        }
+        
+        .sidebar-title {
+            font-size: 1.6rem;
+            margin-bottom: 20px;
+            padding-bottom: 10px;
+            border-bottom: 2px solid #3498db;
+            color: #2c3e50;
+            display: flex;
+            align-items: center;
+            gap: 10px;
+        }
+        
+        .sidebar-title::before {
+            content: "📋";
+        }
+        
+        #toc {
+            list-style: none;
+            
+            padding-left: 0;
+        }
+        #toc ul {
+            list-style: none; /* 必须添加 */
+        }
+        
+        
+        #toc li {
+            margin-bottom: 8px;
+            transition: all 0.3s ease;
+        }
+        
+        #toc a {
+            text-decoration: none;
+            color: #34495e;
+            display: block;
+            padding: 8px 15px;
+            border-radius: 8px;
+            transition: all 0.2s ease;
+            font-weight: 500;
+        }
+        
+        #toc a:hover {
+            background: #e3f2fd;
+            color: #2980b9;
+            transform: translateX(5px);
+        }
+        #toc .h1 a::before { content: "■ "; color: #3498db; }
+        #toc .h2 a::before { content: "► "; color: #9b59b6; }
+        #toc .h3 a::before { content: "▸ "; color: #2ecc71; }
+        #toc .h1 a {
+            font-size: 1.2rem;
+            font-weight: 600;
+            color: #2980b9;
+            border-left: 4px solid #3498db;
+
+        }
+        
+        #toc .h2 a {
+            font-size: 1.1rem;
+            padding-left: 30px;
+            font-weight: normal;
+            color: #34495e;
+            font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
+            border-left: 3px solid #9b59b6;
+
+        }
+
+        #toc .h3 a {
+            font-size: 1rem;
+            padding-left: 45px;
+            color: #34495e;
+            font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
+            border-left: 2px solid #2ecc71;
+        }
+        
+        #toc .h4 a {
+            font-size: 0.95rem;
+            padding-left: 60px;
+            color: #34495e;
+            font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
+            border-left: 2px solid #f39c12;
+        }
+        
+        #toc .h5 a {
+            font-size: 0.9rem;
+            padding-left: 75px;
+            color: #34495e;
+            font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
+            border-left: 2px solid #e74c3c;
+        }
+        #toc .h6 a {
+            font-size: 0.85rem;
+            padding-left: 90px;
+            color: #34495e;
+            font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
+            border-left: 2px solid #e74c3c;
+        }
+
+        
+        /* 主内容区样式 */
+        .content {
+            flex: 1;
+            background: rgba(255, 255, 255, 0.95);
+            border-radius: 12px;
+            padding: 40px;
+            box-shadow: 0 8px 30px rgba(0, 0, 0, 0.12);
+        }
+        
+        .content-section {
+            margin-bottom: 50px;
+        }
+        
+        .content-section h2 {
+            font-size: 2rem;
+            margin-bottom: 20px;
+            padding-bottom: 10px;
+            border-bottom: 2px solid #3498db;
+            color: #2c3e50;
+        }
+        
+        .content-section h3 {
+            font-size: 1.6rem;
+            margin: 25px 0 15px;
+            color: #2980b9;
+        }
+        
+        .content-section h4 {
+            font-size: 1.3rem;
+            margin: 20px 0 12px;
+            color: #9b59b6;
+        }
+        
+        .content-section h5 {
+            font-size: 1.1rem;
+            margin: 18px 0 10px;
+            color: #e67e22;
+        }
+        
+        .content-section h6 {
+            font-size: 1rem;
+            margin: 16px 0 8px;
+            color: #e74c3c;
+        }
+        
+        .content-section p {
+            margin-bottom: 15px;
+            font-size: 1.05rem;
+            color: #555;
+            line-height: 1.7;
+        }
+        
+        /* 列表样式，有序列表的编号由转换程序计算后直接写在文本前 */
+        .content ol {
+            list-style: none;
+            padding-left: 30px;
+            margin-bottom: 15px;
+        }
+
+        .content ul {
+            padding-left: 45px;
+            margin-bottom: 15px;
+        }
+
+        .content li {
+            font-size: 1.05rem;
+            color: #555;
+            line-height: 1.7;
+            margin-bottom: 6px;
+        }
+
+        .list-label {
+            margin-right: 8px;
+        }
+
+        .code-block {
+            background: #2c3e50;
+            color: #ecf0f1;
+            padding: 20px;
+            border-radius: 8px;
+            margin: 20px 0;
+            font-family: 'Courier New', monospace;
+            overflow-x: auto;
+        }
+        
+        .highlight {
+            background-color: rgba(255, 255, 0, 0.2);
+            padding: 2px 5px;
+            border-radius: 4px;
+        }
+        
+        /* 响应式设计 */
+        @media (max-width: 900px) {
+            .container {
+                flex-direction: column;
+            }
+            
+            .sidebar {
+                position: static;
+                width: 100%;
+            }
+        }
+        
+        .back-to-top {
+            position: fixed;
+            bottom: 30px;
+            right: 30px;
+            background: #3498db;
+            color: white;
+            width: 50px;
+            height: 50px;
+            border-radius: 50%;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            font-size: 1.5rem;
+            cursor: pointer;
+            box-shadow: 0 4px 10px rgba(0, 0, 0, 0.2);
+            transition: all 0.3s ease;
+            opacity: 0;
+            transform: translateY(20px);
+            z-index: 100;
+        }
+        
+        .back-to-top.show {
+            opacity: 1;
+            transform: translateY(0);
+        }
+        
+        .back-to-top:hover {
+            background: #2980b9;
+            transform: scale(1.1);
+        }
+        
+        footer {
+            text-align: center;
+            margin-top: 40px;
+            padding: 20px;
+            color: #7f8c8d;
+            font-size: 0.9rem;
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <aside class="sidebar">
+            <h2 class="sidebar-title">文档目录</h2>
+            <ul id="toc"></ul>
+        </aside>
+        
+        <main class="content">"""
+
+# 页面模板：正文之后的部分（页脚、目录脚本）
+HTML_TAIL = """        </main>
+    </div>
+    
+    <div class="back-to-top" id="backToTop">↑</div>
+    
+    <footer>
+        <p>已经到底啦</p>
+    </footer>
+    
+    <script>
+        document.addEventListener('DOMContentLoaded', function() {
+            // 生成目录
+            generateTOC();
+            
+            // 设置滚动高亮
+            window.addEventListener('scroll', highlightActiveHeading);
+            
+            // 初始化返回顶部按钮
+            initBackToTop();
+            
+            // 添加平滑滚动
+            addSmoothScrolling();
+
+            
+        });
+        
+        function generateTOC() {
+            const tocContainer = document.getElementById('toc');
+            const headings = document.querySelectorAll('.content h1, .content h2, .content h3, .content h4, .content h5, .content h6');
+            
+            // 用于跟踪当前层级
+            let currentLevel = 0;
+            // 目录栈，用于处理嵌套层级
+            const tocStack = [tocContainer];
+            
+            // 清空目录容器
+            tocContainer.innerHTML = '';
+            
+            // 遍历所有标题元素
+            headings.forEach((heading, index) => {
+                // 确保标题有ID
+                if (!heading.id) {
+                    heading.id = 'heading-' + index;
+                }
+                
+                // 获取标题级别（h1->1, h2->2, ...）
+                const level = parseInt(heading.tagName.substring(1));
+                
+                // 创建列表项
+                const li = document.createElement('li');
+                li.className = `h${level}`;
+                
+                // 创建链接
+                const a = document.createElement('a');
+                a.href = `#${heading.id}`;
+                a.textContent = heading.textContent;
+                a.dataset.level = level;
+                
+                li.appendChild(a);
+                
+                // 处理层级关系
+                if (level > currentLevel) {
+                    // 进入更深层级 - 创建新的ul
+                    const ul = document.createElement('ul');
+                    li.appendChild(ul);
+                    tocStack[tocStack.length - 1].appendChild(li);
+                    tocStack.push(ul);
+                } else if (level < currentLevel) {
+                    // 返回上层级 - 弹出栈
+                    const popCount = currentLevel - level;
+                    for (let i = 0; i < popCount; i++) {
+                        if (tocStack.length > 1) tocStack.pop();
+                    }
+                    tocStack[tocStack.length - 1].appendChild(li);
+                } else {
+                    // 同级 - 直接添加到当前ul
+                    tocStack[tocStack.length - 1].appendChild(li);
+                }
+                
+                // 更新当前层级
+                currentLevel = level;
+            });
+        }
+        
+        function highlightActiveHeading() {
+            const headings = document.querySelectorAll('.content h1, .content h2, .content h3, .content h4, .content h5, .content h6');
+            const tocLinks = document.querySelectorAll('#toc a');
+            
+            // 移除所有活动类
+            tocLinks.forEach(link => link.classList.remove('active'));
+            
+            // 找到当前视口最顶部的标题
+            let activeHeading = null;
+            let minDistance = Infinity;
+            
+            headings.forEach(heading => {
+                const rect = heading.getBoundingClientRect();
+                // 计算标题顶部与视口顶部的距离
+                const distance = rect.top;
+                
+                // 如果标题在视口顶部附近，且距离更小
+                if (distance >= 0 && distance < minDistance) {
+                    minDistance = distance;
+                    activeHeading = heading;
+                }
+            });
+            
+            // 高亮对应的目录项
+            if (activeHeading) {
+                const activeLink = document.querySelector(`#toc a[href="#${activeHeading.id}"]`);
+                if (activeLink) {
+                    activeLink.classList.add('active');
+                    
+                    // 滚动到活动链接位置
+                    activeLink.scrollIntoView({ behavior: 'smooth', block: 'nearest', inline: 'start' });
+                }
+            }
+            
+            // 处理返回顶部按钮
+            const backToTop = document.getElementById('backToTop');
+            if (window.scrollY > 300) {
+                backToTop.classList.add('show');
+            } else {
+                backToTop.classList.remove('show');
+            }
+        }
+        
+        function initBackToTop() {
+            const backToTop = document.getElementById('backToTop');
+            backToTop.addEventListener('click', () => {
+                window.scrollTo({
+                    top: 0,
+                    behavior: 'smooth'
+                });
+            });
+        }
+        
+        function addSmoothScrolling() {
+            // 为目录链接添加平滑滚动
+            document.querySelectorAll('#toc a').forEach(link => {
+                link.addEventListener('click', function(e) {
+                    e.preventDefault();
+                    const targetId = this.getAttribute('href');
+                    const targetElement = document.querySelector(targetId);
+                    
+                    if (targetElement) {
+                        window.scrollTo({
+                            top: targetElement.offsetTop - 30,
+                            behavior: 'smooth'
+                        });
+                        
+                        // 更新URL hash
+                        history.replaceState(null, null, targetId);
+                    }
+                });
+            });
+        }
+        
+    </script>
+</body>
+</html>"""
+
+
+# 每个进程内按(是否压缩, 站点根目录)缓存的页面模板，整次运行只生成一次
+_page_templates = {}
+
+
+def page_template(minify=False, site_root=None):
+    """
+    功能 取页面模板的三段(标题之前, 标题到正文之间, 正文之后)
+    参数 minify:是否去掉模板中的注释和多余空白
+         site_root:设置后在</body>之前插入注册service worker的脚本
+    """
+    key = (minify, site_root)
+    template = _page_templates.get(key)
+    if template is None:
+        tail = HTML_TAIL
+        if site_root is not None:
+            tail = tail.replace('\n</body>', register_script(site_root) + '</body>')
+        template = (HTML_HEAD, HTML_BODY_START, tail)
+        if minify:
+            template = tuple(minify_html(part) for part in template)
+        _page_templates[key] = template
+    return template
+
+
+# 中间表示的块类型
+BLOCK_BLANK = 'blank'
+BLOCK_HEADING = 'heading'
+BLOCK_PARAGRAPH = 'paragraph'
+BLOCK_LIST_ITEM = 'list_item'
+
+
+class Block:
+    """
+    功能 文档中间表示里的一个块，每个段落只解析一次，之后交给各个渲染器
+    kind:块类型 level:标题级别，非标题为None indent:左缩进(磅) spans:文本片段元组
+    spans中纯文本为str，链接为(文本, 地址)
+    numbering:列表编号(numId, ilvl)，没有编号为None anchors:块上的书签名元组
+    label/ordered:apply_numbering计算出的编号文本和是否为有序列表，与前文有关
+    """
+    __slots__ = ('kind', 'level', 'indent', 'spans', 'numbering', 'anchors', 'label', 'ordered')
+
+    def __init__(self, kind, level=None, indent=0.0, spans=(), numbering=None, anchors=(),
+                 label=None, ordered=False):
+        self.kind = kind
+        self.level = level
+        self.indent = indent
+        self.spans = spans
+        self.numbering = numbering
+        self.anchors = anchors
+        self.label = label
+        self.ordered = ordered
+
+    @property
+    def text(self):
+        return ''.join(span if isinstance(span, str) else span[0] for span in self.spans)
+
+    def __repr__(self):
+        return f"Block({self.kind!r}, level={self.level!r}, indent={self.indent!r}, text={self.text!r})"
+
+
+class HtmlRenderer:
+    """
+    功能 把Block渲染成完整的html页面
+    """
+    suffix = '.html'
+
+    def __init__(self, site_root=None, minify=False):
+        # 站点根目录的相对路径，设置后页面会注册离线浏览用的service worker
+        self.site_root = site_root
+        self.head, self.body_start, self.tail = page_template(minify, site_root)
+        # 压缩模式下块之间不换行
+        self.newline = '' if minify else '\n'
+
+    def start(self, title):
+        self.parts = [self.head, html.escape(title, quote=False), self.body_start]
+        # 当前打开的列表 [(标签名, 列表级别)]，每个列表的最后一个<li>保持打开，用来嵌套下级列表
+        self.lists = []
+
+    def block(self, block):
+        if block.kind == BLOCK_LIST_ITEM:
+            self.list_item(block)
+            return
+        self.close_lists()
+
+        if block.kind == BLOCK_BLANK:
+            self.parts.append(self.anchors(block.anchors) + "<br><br>" + self.newline)
+        elif block.kind == BLOCK_HEADING:
+            # 标题的第一个锚点作为标题id，目录脚本会直接使用它
+            text = self.anchors(block.anchors[1:]) + self.spans(block)
+            if block.ordered and block.label:
+                text = html.escape(block.label, quote=False) + ' ' + text
+            start = '<h' + str(block.level)
+            if block.anchors:
+                start += ' id="' + html.escape(block.anchors[0]) + '"'
+            self.parts.append(start + '>' + text + '</h' + str(block.level) + '>' + self.newline)
+        else:
+            text = self.anchors(block.anchors) + self.spans(block)
+            n = math.floor(block.indent/20)
+            if n > 0:
+                string = '<blockquote>'*n + text + '</blockquote>'*n
+            else:
+                string = '<p>' + text + '</p>'
+            self.parts.append(string + self.newline)
+
+    @staticmethod
+    def anchors(names):
+        return ''.join('<a id="' + html.escape(name) + '"></a>' for name in names)
+
+    @staticmethod
+    def spans(block):
+        parts = []
+        for span in block.spans:
+            # 正文文本要转义，文档里的 < & 等字符不能被当成标签
+            if isinstance(span, str):
+                parts.append(html.escape(span, quote=False))
+            else:
+                parts.append('<a href="' + html.escape(span[1]) + '">' + html.escape(span[0], quote=False) + '</a>')
+        return ''.join(parts)
+
+    def list_item(self, block):
+        tag = 'ol' if block.ordered else 'ul'
+        ilvl = block.numbering[1]
+        lists = self.lists
+        while lists and lists[-1][1] > ilvl:
+            self.parts.append('</li></' + lists.pop()[0] + '>' + self.newline)
+        if lists and lists[-1][1] == ilvl:
+            if lists[-1][0] == tag:
+                self.parts.append('</li>' + self.newline)
+            else:
+                self.parts.append('</li></' + lists.pop()[0] + '>' + self.newline)
+        if not lists or lists[-1][1] < ilvl:
+            self.parts.append('<' + tag + '>')
+            lists.append((tag, ilvl))
+
+        text = self.anchors(block.anchors) + self.spans(block)
+        if block.ordered:
+            self.parts.append('<li><span class="list-label">' + html.escape(block.label, quote=False) + '</span>' + text)
+        else:
+            self.parts.append('<li>' + text)
+
+    def close_lists(self):
+        while self.lists:
+            self.parts.append('</li></' + self.lists.pop()[0] + '>' + self.newline)
+
+    def finish(self):
+        self.close_lists()
+        self.parts.append(self.tail)
+        return ''.join(self.parts)
+
+
+class JsonOutlineRenderer:
+    """
+    功能 把标题渲染成嵌套的json大纲，供检索、统计类任务使用
+    """
+    suffix = '.outline.json'
+
+    def start(self, title):
+        self.root = {'title': title, 'level': 0, 'children': []}
+        self.stack = [self.root]
+        self.paragraph_count = 0
+
+    def block(self, block):
+        if block.kind in (BLOCK_PARAGRAPH, BLOCK_LIST_ITEM):
+            self.paragraph_count += 1
+        if block.kind != BLOCK_HEADING:
+            return
+        node = {'title': block.text.strip(), 'level': block.level, 'children': []}
+        while len(self.stack) > 1 and self.stack[-1]['level'] >= block.level:
+            self.stack.pop()
+        self.stack[-1]['children'].append(node)
+        self.stack.append(node)
+
+    def finish(self):
+        outline = {
+            'title': self.root['title'],
+            'paragraphs': self.paragraph_count,
+            'headings': self.root['children'],
+        }
+        return json.dumps(outline, ensure_ascii=False, indent=2)
+
+
+class TextRenderer:
+    """
+    功能 把Block渲染成纯文本，每个段落一行
+    """
+    suffix = '.txt'
+
+    def start(self, title):
+        self.lines = []
+
+    def block(self, block):
+        if block.label and block.ordered:
+            self.lines.append(block.label + ' ' + block.text)
+        elif block.kind == BLOCK_LIST_ITEM:
+            self.lines.append('  ' * block.numbering[1] + '• ' + block.text)
+        else:
+            self.lines.append(block.text)
+
+    def finish(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+# 可用的输出格式，新增格式只需要在这里注册一个渲染器
+RENDERERS = {
+    'html': HtmlRenderer,
+    'json': JsonOutlineRenderer,
+    'txt': TextRenderer,
+}
+
+
+def render_blocks(title, blocks, renderers):
+    """
+    功能 遍历一次Block列表，同时驱动多个渲染器
+    参数 title:文档标题 blocks:Block列表 renderers:渲染器列表
+    返回 与renderers一一对应的输出字符串列表
+    """
+    for renderer in renderers:
+        renderer.start(title)
+    for block in blocks:
+        for renderer in renderers:
+            renderer.block(block)
+    return [renderer.finish() for renderer in renderers]
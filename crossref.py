@@ -0,0 +1,253 @@
+import re
+
+from docx_xml import W, W_R, W_HYPERLINK, run_text
+
+
+W_BOOKMARK_START = W + 'bookmarkStart'
+W_NAME = W + 'name'
+W_ANCHOR = W + 'anchor'
+W_FLD_SIMPLE = W + 'fldSimple'
+W_INSTR = W + 'instr'
+W_FLD_CHAR = W + 'fldChar'
+W_FLD_CHAR_TYPE = W + 'fldCharType'
+W_INSTR_TEXT = W + 'instrText'
+R_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+
+# Word自动插入的书签，不作为锚点
+IGNORED_BOOKMARKS = {'_GoBack'}
+
+# 引用书签的域
+REF_FIELDS = {'REF', 'PAGEREF', 'NOTEREF'}
+
+# 域代码的参数，带引号的参数中可以有空格
+FIELD_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+
+# HYPERLINK域中带一个参数的开关：\l书签 \o提示文字 \t目标窗口
+HYPERLINK_VALUE_SWITCHES = {'\\l', '\\o', '\\t'}
+
+# 允许写进href的协议，其它协议(javascript:、data:、file:等)的链接按纯文本输出
+SAFE_SCHEMES = {'http', 'https', 'mailto'}
+
+LINK_SCHEME = re.compile(r'^([a-zA-Z][a-zA-Z0-9+.-]*):')
+
+# 浏览器解析地址前会去掉的空白和控制字符，java\tscript: 也会被当成 javascript:
+URL_IGNORED = re.compile(r'[\x00-\x20\x7f]')
+
+DOCX_LINK = re.compile(r'^(?![a-zA-Z][a-zA-Z0-9+.-]*:)(.*)\.docx(#.*)?$', re.IGNORECASE)
+
+
+def external_hyperlinks(part):
+    """
+    功能 取出文档部件中所有外部超链接关系
+    参数 part:python-docx的DocumentPart
+    返回 rId->目标地址 的字典
+    """
+    return {rel_id: rel.target_ref for rel_id, rel in part.rels.items() if rel.is_external}
+
+
+def safe_href(target):
+    """
+    功能 检查链接地址的协议，只允许http、https、mailto以及相对地址和#锚点
+    返回 可以写进href的地址，不安全时返回None
+    """
+    match = LINK_SCHEME.match(URL_IGNORED.sub('', target))
+    if match is not None and match.group(1).lower() not in SAFE_SCHEMES:
+        return None
+    return target
+
+
+def docx_link_to_html(target):
+    """
+    功能 指向同一目录树中其它docx的相对链接改为指向转换后的html，其它链接原样返回
+    """
+    match = DOCX_LINK.match(target)
+    if match is None:
+        return target
+    return match.group(1) + '.html' + (match.group(2) or '')
+
+
+def field_tokens(instr):
+    """
+    功能 按空白切分域代码，带引号的参数作为一个整体并去掉引号
+    """
+    return [m.group(1) if m.group(1) is not None else m.group(2) for m in FIELD_TOKEN.finditer(instr)]
+
+
+def field_target(instr):
+    """
+    功能 从域代码中取出链接目标
+    参数 instr:域代码，如 REF _Ref123 \\h 或 HYPERLINK "other.docx" \\l "bookmark"
+    返回 链接地址，不是引用类的域时返回None
+    """
+    tokens = field_tokens(instr)
+    if not tokens:
+        return None
+    name = tokens[0].upper()
+    if name in REF_FIELDS and len(tokens) > 1:
+        return '#' + tokens[1]
+    if name == 'HYPERLINK':
+        target = None
+        switches = {}
+        args = iter(tokens[1:])
+        for arg in args:
+            if arg in HYPERLINK_VALUE_SWITCHES:
+                switches[arg] = next(args, None)
+            elif arg.startswith('\\'):
+                continue
+            elif target is None:
+                target = arg
+        anchor = switches.get('\\l')
+        if target is not None:
+            target = docx_link_to_html(target)
+            return target + '#' + anchor if anchor else target
+        return '#' + anchor if anchor else None
+    return None
+
+
+def _hyperlink_target(element, hyperlinks):
+    target = None
+    rel_id = element.get(R_ID)
+    if rel_id is not None and rel_id in hyperlinks:
+        target = docx_link_to_html(hyperlinks[rel_id])
+    anchor = element.get(W_ANCHOR)
+    if anchor is not None:
+        target = (target or '') + '#' + anchor
+    return target
+
+
+class _SpanBuilder:
+    """
+    功能 拼接段落的文本片段，相邻的纯文本合并成一个片段，没有地址或地址不安全的链接按纯文本处理
+    """
+
+    def __init__(self):
+        self.spans = []
+
+    def text(self, text):
+        if not text:
+            return
+        if self.spans and isinstance(self.spans[-1], str):
+            self.spans[-1] += text
+        else:
+            self.spans.append(text)
+
+    def link(self, text, href):
+        if not text:
+            return
+        if href is not None:
+            href = safe_href(href)
+        if href is None:
+            self.text(text)
+        else:
+            self.spans.append((text, href))
+
+
+def leading_bookmarks(p):
+    """
+    功能 取出紧挨在段落之前、与段落同级的bookmarkStart元素，按文档顺序返回
+    这些书签挂在该段落上，但不在段落xml里
+    """
+    bookmarks = []
+    previous = p.getprevious()
+    while previous is not None and previous.tag == W_BOOKMARK_START:
+        bookmarks.append(previous)
+        previous = previous.getprevious()
+    bookmarks.reverse()
+    return bookmarks
+
+
+def paragraph_content(p, hyperlinks):
+    """
+    功能 一次遍历段落xml，取出文本片段、超链接、引用域和书签
+    参数 p:段落元素 hyperlinks:external_hyperlinks的返回值
+    返回 (spans, anchors) spans为文本片段元组，纯文本为str，链接为(文本, 地址)；anchors为书签名元组
+         所有片段的文本拼起来与paragraph.text一致(fldSimple的结果文本除外，paragraph.text会丢掉它)
+    """
+    builder = _SpanBuilder()
+
+    # 段落之间的书签挂在下一个段落上
+    anchors = [bookmark.get(W_NAME) for bookmark in leading_bookmarks(p)]
+
+    # 复杂域的栈，每一层为 [域代码, 是否已到结果部分, 结果文本]
+    fields = []
+    for child in p:
+        tag = child.tag
+        if tag == W_R:
+            for item in child:
+                if item.tag == W_FLD_CHAR:
+                    char_type = item.get(W_FLD_CHAR_TYPE)
+                    if char_type == 'begin':
+                        fields.append(['', False, []])
+                    elif char_type == 'separate' and fields:
+                        fields[-1][1] = True
+                    elif char_type == 'end' and fields:
+                        instr, _, result = fields.pop()
+                        text = ''.join(result)
+                        if fields:
+                            # 嵌套域的结果作为外层域结果的一部分
+                            fields[-1][2].append(text)
+                        else:
+                            builder.link(text, field_target(instr))
+                elif item.tag == W_INSTR_TEXT and fields and not fields[-1][1]:
+                    fields[-1][0] += item.text or ''
+            text = run_text(child)
+            if fields:
+                fields[-1][2].append(text)
+            else:
+                builder.text(text)
+        elif tag == W_HYPERLINK:
+            text = ''.join(run_text(run) for run in child.iterchildren(W_R))
+            if fields:
+                fields[-1][2].append(text)
+            else:
+                builder.link(text, _hyperlink_target(child, hyperlinks))
+        elif tag == W_FLD_SIMPLE:
+            text = ''.join(run_text(run) for run in child.iterchildren(W_R))
+            builder.link(text, field_target(child.get(W_INSTR, '')))
+        elif tag == W_BOOKMARK_START:
+            anchors.append(child.get(W_NAME))
+
+    # 跨段落的域，结果按纯文本输出
+    for _, _, result in fields:
+        builder.text(''.join(result))
+
+    anchors = tuple(name for name in anchors if name and name not in IGNORED_BOOKMARKS)
+    return tuple(builder.spans), anchors
+
+
+def build_anchor_index(blocks, heading_kind):
+    """
+    功能 一次遍历收集文档中所有的书签和标题锚点
+    没有书签的标题按生成目录的脚本的规则补上heading-序号，保证目录和跨文档链接使用同一个id
+    参数 blocks:Block列表 heading_kind:标题块的类型
+    返回 锚点名->块下标 的字典
+    """
+    index = {}
+    heading_count = 0
+    for position, block in enumerate(blocks):
+        if block.kind == heading_kind:
+            if not block.anchors:
+                block.anchors = ('heading-' + str(heading_count),)
+            heading_count += 1
+        for name in block.anchors:
+            index.setdefault(name, position)
+    return index
+
+
+def resolve_links(blocks, index):
+    """
+    功能 检查文档内链接，目标锚点不存在的链接(例如指向表格里的书签)退化成纯文本，避免死链
+    每个链接只做一次字典查找，不会为每个链接重新扫描文档
+    """
+    for block in blocks:
+        if all(isinstance(span, str) for span in block.spans):
+            continue
+        builder = _SpanBuilder()
+        for span in block.spans:
+            if isinstance(span, str):
+                builder.text(span)
+            elif span[1].startswith('#') and span[1][1:] not in index:
+                builder.text(span[0])
+            else:
+                builder.link(*span)
+        block.spans = tuple(builder.spans)
@@ -0,0 +1,152 @@
+import os
+import fnmatch
+
+
+# 默认包含的文件
+DEFAULT_INCLUDE = ['*.docx']
+
+# 默认排除的文件和目录。~$开头的是word打开文档时产生的锁文件
+DEFAULT_EXCLUDE = [
+    '~$*',
+    '.git', '.svn', '.hg',
+    'node_modules', '__pycache__', '.venv', 'venv',
+    '*.bak', 'backup', 'backups', '备份',
+]
+
+
+class DocEntry:
+    """
+    功能 发现阶段产出的一个待转换文档
+    path:docx绝对路径 rel_path:相对于扫描根目录的路径(用/分隔) html_path:输出html的路径
+    size/mtime_ns/inode:扫描时缓存的stat结果，供增量和并行转换使用，不需要再次stat
+    """
+    __slots__ = ('path', 'rel_path', 'html_path', 'size', 'mtime_ns', 'inode')
+
+    def __init__(self, path, rel_path, html_path, size, mtime_ns, inode):
+        self.path = path
+        self.rel_path = rel_path
+        self.html_path = html_path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.inode = inode
+
+    def is_up_to_date(self):
+        """
+        功能 判断输出的html是否比docx新
+        返回 True:html已存在且不旧于docx，可以跳过
+        """
+        try:
+            return os.stat(self.html_path).st_mtime_ns >= self.mtime_ns
+        except OSError:
+            return False
+
+    def __repr__(self):
+        return f"DocEntry({self.rel_path!r})"
+
+
+def _matches(patterns, name, rel_path):
+    """
+    功能 判断文件名或相对路径是否匹配任意一个glob模式
+    """
+    # 与原来的.lower().endswith('.docx')一致，匹配不区分大小写
+    name = name.lower()
+    rel_path = rel_path.lower()
+    for pattern in patterns:
+        pattern = pattern.lower()
+        if fnmatch.fnmatchcase(name, pattern) or fnmatch.fnmatchcase(rel_path, pattern):
+            return True
+    return False
+
+
+def discover_documents(root, include=None, exclude=None, output_root=None, follow_symlinks=False):
+    """
+    功能 基于os.scandir扫描root下所有需要转换的文档
+    参数 root:扫描根目录
+         include:包含的glob模式列表，匹配文件名或相对路径，默认*.docx
+         exclude:排除的glob模式列表，命中的目录整个剪枝不再进入，默认见DEFAULT_EXCLUDE
+         output_root:输出根目录，为None时html写在docx旁边。位于root内时自动排除
+         follow_symlinks:是否进入符号链接目录，开启时按(st_dev, st_ino)防止链接成环。指向文件的链接总是包含
+    返回 DocEntry列表，按相对路径排序，保证每次运行顺序一致
+    """
+    include = DEFAULT_INCLUDE if include is None else include
+    exclude = DEFAULT_EXCLUDE if exclude is None else exclude
+    root = os.path.abspath(root)
+    if output_root is not None:
+        output_root = os.path.abspath(output_root)
+
+    entries = []
+    visited = set()
+    root_stat = os.stat(root)
+    visited.add((root_stat.st_dev, root_stat.st_ino))
+
+    # 用栈代替递归，目录层级很深时也不会栈溢出
+    stack = [(root, '')]
+    # 符号链接目录等真实目录全部扫描完再进入，同一个目录既能直接到达又能经链接到达时保留真实路径
+    linked = []
+    while stack or linked:
+        if stack:
+            dir_path, rel_dir = stack.pop()
+        else:
+            dir_path, rel_dir, key = linked.pop()
+            if key in visited:
+                continue
+            visited.add(key)
+        try:
+            it = os.scandir(dir_path)
+        except OSError as e:
+            print(f"无法读取目录: {dir_path} ({e})")
+            continue
+
+        with it:
+            for entry in it:
+                name = entry.name
+                rel_path = rel_dir + '/' + name if rel_dir else name
+                try:
+                    if entry.is_dir(follow_symlinks=follow_symlinks):
+                        if _matches(exclude, name, rel_path):
+                            continue
+                        if output_root is not None and entry.path == output_root:
+                            continue
+                        if not follow_symlinks:
+                            stack.append((entry.path, rel_path))
+                            continue
+                        # 所有目录都记录(st_dev, st_ino)，指向祖先目录的链接不会再被走一遍。
+                        # DirEntry.stat()的结果会被缓存
+                        st = entry.stat()
+                        key = (st.st_dev, st.st_ino)
+                        if entry.is_symlink():
+                            linked.append((entry.path, rel_path, key))
+                        elif key not in visited:
+                            visited.add(key)
+                            stack.append((entry.path, rel_path))
+
+                    # 指向文件的符号链接总是跟随，与os.walk一致；follow_symlinks只控制是否进入链接目录
+                    elif entry.is_file():
+                        if not _matches(include, name, rel_path):
+                            continue
+                        if _matches(exclude, name, rel_path):
+                            continue
+                        st = entry.stat()
+                        entries.append(DocEntry(
+                            path=entry.path,
+                            rel_path=rel_path,
+                            html_path=_html_path(output_root, rel_path, entry.path),
+                            size=st.st_size,
+                            mtime_ns=st.st_mtime_ns,
+                            inode=(st.st_dev, st.st_ino),
+                        ))
+                except OSError as e:
+                    print(f"无法读取: {entry.path} ({e})")
+
+    entries.sort(key=lambda e: e.rel_path)
+    return entries
+
+
+def _html_path(output_root, rel_path, file_path):
+    """
+    功能 计算文档对应的html输出路径
+    """
+    stem = os.path.splitext(rel_path)[0]
+    if output_root is None:
+        return os.path.splitext(file_path)[0] + '.html'
+    return os.path.join(output_root, *stem.split('/')) + '.html'
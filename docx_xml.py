@@ -0,0 +1,126 @@
+import xml.etree.ElementTree as ET
+
+
+# 直接读取docx内部xml的工具函数，不依赖python-docx，ElementTree和lxml的元素都可以使用
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+W_BODY = W + 'body'
+W_P = W + 'p'
+W_PPR = W + 'pPr'
+W_PSTYLE = W + 'pStyle'
+W_OUTLINE = W + 'outlineLvl'
+W_R = W + 'r'
+W_HYPERLINK = W + 'hyperlink'
+W_VAL = W + 'val'
+W_NUMPR = W + 'numPr'
+W_NUMID = W + 'numId'
+W_ILVL = W + 'ilvl'
+
+W_BR = W + 'br'
+W_TYPE = W + 'type'
+
+# run里会出现在paragraph.text中的元素，None表示取元素自身的文本
+RUN_TEXT = {W + 't': None, W + 'tab': '\t', W_BR: '\n', W + 'cr': '\n',
+            W + 'noBreakHyphen': '-', W + 'ptab': '\t'}
+
+
+def read_style_outline_levels(styles_xml):
+    """
+    功能 从styles.xml中解析出每个段落样式最终生效的大纲级别，沿basedOn逐级向上查找，与isTitle的逻辑一致
+    参数 styles_xml:styles.xml的内容(bytes)，为None时表示文档没有样式
+    返回 (levels, default_style_id) levels为 样式id->大纲级别 的字典，没有大纲级别的样式不在其中
+    """
+    if styles_xml is None:
+        return {}, None
+
+    based_on = {}
+    own_level = {}
+    default_style_id = None
+    for style in ET.fromstring(styles_xml).iter(W + 'style'):
+        if style.get(W + 'type') != 'paragraph':
+            continue
+        style_id = style.get(W + 'styleId')
+        if style.get(W + 'default') in ('1', 'true', 'on'):
+            default_style_id = style_id
+        parent = style.find(W + 'basedOn')
+        based_on[style_id] = parent.get(W_VAL) if parent is not None else None
+        outline = style.find(W_PPR + '/' + W_OUTLINE)
+        if outline is not None:
+            own_level[style_id] = int(outline.get(W_VAL)) + 1
+
+    levels = {}
+    for style_id in based_on:
+        current = style_id
+        seen = set()
+        # seen防止basedOn成环
+        while current is not None and current not in seen:
+            seen.add(current)
+            if current in own_level:
+                levels[style_id] = own_level[current]
+                break
+            current = based_on.get(current)
+    return levels, default_style_id
+
+
+def paragraph_text(p):
+    """
+    功能 拼出与paragraph.text相同的段落文本，只看直接的run和超链接里的run
+    """
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            runs = (child,)
+        elif child.tag == W_HYPERLINK:
+            runs = child.findall(W_R)
+        else:
+            continue
+        for run in runs:
+            parts.append(run_text(run))
+    return ''.join(parts)
+
+
+def run_text(run):
+    """
+    功能 拼出与run.text相同的文本，分页符和分栏符不产生文本
+    """
+    parts = []
+    for item in run:
+        if item.tag not in RUN_TEXT:
+            continue
+        value = RUN_TEXT[item.tag]
+        if value is None:
+            parts.append(item.text or '')
+        elif item.tag != W_BR or item.get(W_TYPE, 'textWrapping') == 'textWrapping':
+            parts.append(value)
+    return ''.join(parts)
+
+
+def paragraph_outline_level(p, style_levels, default_style_id):
+    """
+    功能 判断段落的大纲级别：先看段落自身的outlineLvl，再看样式表
+    参数 p:段落元素 style_levels/default_style_id:read_style_outline_levels的返回值
+    返回 大纲级别，不是标题时返回None
+    """
+    ppr = p.find(W_PPR)
+    if ppr is not None:
+        outline = ppr.find(W_OUTLINE)
+        if outline is not None:
+            return int(outline.get(W_VAL)) + 1
+    style = ppr.find(W_PSTYLE) if ppr is not None else None
+    style_id = style.get(W_VAL) if style is not None else default_style_id
+    return style_levels.get(style_id)
+
+
+def numbering_properties(element):
+    """
+    功能 读取段落或样式pPr中的numPr
+    参数 element:段落元素或样式元素
+    返回 (numId, ilvl) 没有设置的项为None
+    """
+    numpr = element.find(W_PPR + '/' + W_NUMPR)
+    if numpr is None:
+        return None, None
+    num_id = numpr.find(W_NUMID)
+    ilvl = numpr.find(W_ILVL)
+    return (num_id.get(W_VAL) if num_id is not None else None,
+            int(ilvl.get(W_VAL)) if ilvl is not None else None)
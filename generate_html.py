@@ -1,10 +1,23 @@
-import math
-
 from docx import Document
 from docx.shared import Length
+from docx.enum.style import WD_STYLE_TYPE
+from lxml import etree
 import os
 import sys
 import re
+import argparse
+import io
+
+from discovery import discover_documents, DEFAULT_INCLUDE, DEFAULT_EXCLUDE
+from isolation import run_isolated
+from pipeline import MemoryBudget, AsyncWriter, prefetch
+from docx_xml import numbering_properties
+from numbering import NumberingIndex, ListCounter
+from style_cache import StyleTableCache, StyleTable
+from offline import site_root_prefix
+from blocks import (Block, BLOCK_BLANK, BLOCK_HEADING, BLOCK_PARAGRAPH, BLOCK_LIST_ITEM,
+                    HtmlRenderer, RENDERERS, render_blocks)
+from crossref import external_hyperlinks, paragraph_content, build_anchor_index, resolve_links
 
 
 def getOutlineLevel(inputXml):
@@ -20,14 +33,16 @@ def getOutlineLevel(inputXml):
     return int(number) + 1
 
 
-def isTitle(paragraph):
+def isTitle(paragraph, text=None):
     """
     功能 判断该段落是否设置了大纲等级
-    参数 paragraph:段落
+    参数 paragraph:段落 text:已经取出的段落文本，传入时不再重新拼接paragraph.text
     返回 None:普通正文，没有大纲级别 0:一级标题 1:二级标题 2:三级标题
     """
+    if text is None:
+        text = paragraph.text
     # 如果是空行，直接返回None
-    if paragraph.text.strip() == '':
+    if text.strip() == '':
         return None
 
     # 如果该段落是直接在段落里设置大纲级别的，根据xml判断大纲级别
@@ -35,8 +50,16 @@ def isTitle(paragraph):
     if paragraphXml.find('<w:outlineLvl') >= 0:
         return getOutlineLevel(paragraphXml)
     # 如果该段落是通过样式设置大纲级别的，逐级检索样式及其父样式，判断大纲级别
+    return get_style_outline_level(paragraph.style)
+
+
+def get_style_outline_level(targetStyle):
+    """
+    功能 沿样式继承链查找样式的大纲级别
+    参数 targetStyle:段落样式
+    返回 大纲级别，没有时返回None
+    """
     # 之所以要检查父样式。原因是如果a样式是大纲1，那么如果a样式改了下字体字号，然后就生成了样式b,那么此时样式b就没有<w:outlineLvl字段。
-    targetStyle = paragraph.style
     while targetStyle is not None:
         # 如果在该级style中找到了大纲级别，返回
         if targetStyle.element.xml.find('<w:outlineLvl') >= 0:
@@ -112,19 +135,68 @@ def get_effective_indent_pt(paragraph, indent_attr):
 
     try:
         # 检查样式继承链
-        style = paragraph.style
-        current_style = style
-        while current_style is not None:
-            style_pf = current_style.paragraph_format
-            style_value = getattr(style_pf, indent_attr)
-            if style_value is not None and isinstance(style_value, Length):
-                return style_value.pt
-            current_style = current_style.base_style
+        style_value = get_style_indent_pt(paragraph.style, indent_attr)
+        if style_value is not None:
+            return style_value
     except AttributeError:
         pass
 
     return 0.0  # 默认值
 
+
+def get_style_indent_pt(style, indent_attr):
+    """
+    获取样式沿继承链生效的缩进值（以磅为单位）
+    :param style: 段落样式
+    :param indent_attr: 缩进属性名称（'left_indent', 'right_indent', 'first_line_indent'）
+    :return: 缩进值（磅），继承链上都没有设置时返回None
+    """
+    current_style = style
+    while current_style is not None:
+        style_pf = current_style.paragraph_format
+        style_value = getattr(style_pf, indent_attr)
+        if style_value is not None and isinstance(style_value, Length):
+            return style_value.pt
+        current_style = current_style.base_style
+    return None
+
+
+def get_numbering(paragraph):
+    """
+    功能 获取段落的列表编号属性，段落上没有设置时沿样式继承链查找
+    参数 paragraph:段落对象
+    返回 (numId, ilvl) 不是编号段落时返回None
+    """
+    num_id, ilvl = numbering_properties(paragraph._p)
+    if num_id is None or ilvl is None:
+        style_num_id, style_ilvl = get_style_numbering(paragraph.style)
+        if num_id is None:
+            num_id = style_num_id
+        if ilvl is None:
+            ilvl = style_ilvl
+    # numId为0表示取消了样式带来的编号
+    if num_id is None or num_id == '0':
+        return None
+    return num_id, ilvl or 0
+
+
+def get_style_numbering(style):
+    """
+    功能 沿样式继承链查找样式的列表编号属性
+    参数 style:段落样式
+    返回 (numId, ilvl) 没有设置的项为None
+    """
+    num_id, ilvl = None, None
+    # 样式里的numPr可能只设置了numId或ilvl中的一项，逐级补全
+    while (num_id is None or ilvl is None) and style is not None:
+        style_num_id, style_ilvl = numbering_properties(style.element)
+        if num_id is None:
+            num_id = style_num_id
+        if ilvl is None:
+            ilvl = style_ilvl
+        style = style.base_style
+    return num_id, ilvl
+
 # 判断缩进的示例用法
 def print_paragraph_indents(docx_path):
     doc = Document(docx_path)
@@ -153,579 +225,369 @@ def print_paragraph_indents(docx_path):
         print("-" * 50)
 
 
-if __name__ == "__main__":
+def parse_blocks(doc, style_cache=None):
+    """
+    功能 把docx文档解析成Block列表
+    参数 doc:Document对象
+         style_cache:StyleTableCache，传入时按styles.xml摘要复用展开后的样式表，不再逐段落遍历样式继承链
+    返回 Block列表
+    """
+    hyperlinks = external_hyperlinks(doc.part)
+    if style_cache is None:
+        return parse_paragraphs(doc.paragraphs, hyperlinks)
+
+    styles_xml = etree.tostring(doc.styles.element)
+    style_table = style_cache.get(styles_xml, lambda: resolve_style_table(doc))
+    return parse_paragraphs(doc.paragraphs, hyperlinks, style_table)
+
+
+def resolve_style_table(doc):
+    """
+    功能 把文档所有段落样式的继承链一次展开成StyleTable
+    参数 doc:Document对象
+    返回 StyleTable
+    """
+    styles = {}
+    for style in doc.styles:
+        if style.type != WD_STYLE_TYPE.PARAGRAPH:
+            continue
+        num_id, ilvl = get_style_numbering(style)
+        styles[style.style_id] = [
+            get_style_outline_level(style),
+            get_style_indent_pt(style, 'left_indent'),
+            get_style_indent_pt(style, 'right_indent'),
+            get_style_indent_pt(style, 'first_line_indent'),
+            num_id,
+            ilvl,
+        ]
+    default_style = doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+    return StyleTable(default_style.style_id if default_style is not None else None, styles)
+
+
+def parse_paragraphs(paragraphs, hyperlinks=None, style_table=None):
+    """
+    功能 把段落列表解析成Block列表
+    参数 paragraphs:Paragraph对象列表 hyperlinks:external_hyperlinks的返回值
+         style_table:展开后的StyleTable，为None时逐段落遍历样式继承链
+    返回 Block列表
+    """
+    hyperlinks = {} if hyperlinks is None else hyperlinks
+    blocks = []
+    for paragraph in paragraphs:
+        # 一次遍历段落xml同时取出文本、链接和书签，不再反复访问paragraph.text
+        p = paragraph._p
+        spans, anchors = paragraph_content(p, hyperlinks)
+        text = ''.join(span if isinstance(span, str) else span[0] for span in spans)
+        if len(text) == 0:
+            blocks.append(Block(BLOCK_BLANK, anchors=anchors))
+            continue
+
+        if style_table is None:
+            level = isTitle(paragraph, text)
+            numbering = get_numbering(paragraph)
+        else:
+            level = style_table.outline_level(p, text)
+            numbering = style_table.numbering(p)
+        if level is not None:
+            blocks.append(Block(BLOCK_HEADING, level=level, spans=spans, numbering=numbering, anchors=anchors))
+            continue
+
+        if style_table is None:
+            indent = get_effective_indent_pt(paragraph, 'left_indent')
+        else:
+            indent = _table_indent_pt(paragraph, style_table, 'left_indent')
+        if numbering is not None:
+            # 列表的缩进由列表级别决定；numId无效时apply_numbering会退回普通段落，仍按left_indent缩进
+            blocks.append(Block(BLOCK_LIST_ITEM, indent=indent, spans=spans, numbering=numbering, anchors=anchors))
+        else:
+            blocks.append(Block(BLOCK_PARAGRAPH, indent=indent, spans=spans, anchors=anchors))
+    return blocks
+
+
+def _table_indent_pt(paragraph, style_table, indent_attr):
+    """
+    功能 与get_effective_indent_pt相同，只是样式部分从StyleTable中直接取
+    """
+    direct_value = getattr(paragraph.paragraph_format, indent_attr)
+    if direct_value is not None and isinstance(direct_value, Length):
+        return direct_value.pt
+    style_value = style_table.indent(paragraph._p, indent_attr)
+    return style_value if style_value is not None else 0.0
+
+
+def read_numbering_index(doc):
+    """
+    功能 解析文档的word/numbering.xml，文档没有编号定义时返回空索引
+    """
+    try:
+        numbering_element = doc.part.numbering_part.element
+    except (KeyError, NotImplementedError):
+        numbering_element = None
+    return NumberingIndex(numbering_element)
 
-    # 获取当前工作目录
-    current_dir = os.getcwd()
-
-    # 遍历当前目录及所有子目录
-    for root, dirs, files in os.walk(current_dir):
-        for file in files:
-            # 检查文件是否以.docx结尾（不区分大小写）
-            if file.lower().endswith('.docx'):
-                if file.lower()[0:2] != "~$":
-                    # 拼接文件的绝对路径
-                    file_path = os.path.join(root, file)
-                    html_file_path = os.path.join(root,file[:-5]+".html")
-                    # 打印绝对路径
-                    print(file_path)
-                    print(html_file_path)
-
-                    # 检查文件是否存在
-                    if os.path.exists(html_file_path):
-                        # 如果存在，则删除文件
-                        os.remove(html_file_path)
-
-                    html_file = open(html_file_path,'w+',encoding='utf-8')
-                    html_file.write("""<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>""")
-                    html_file.write(file[:-5])
-                    html_file.write("""</title>
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-        
-        body {
-            font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
-            line-height: 1.6;
-            color: #333;
-            background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }
-        
-        .container {
-            display: flex;
-            max-width: 1400px;
-            margin: 0 auto;
-            gap: 30px;
-        }
-        
-        header {
-            text-align: center;
-            margin-bottom: 40px;
-            padding: 20px;
-            background: rgba(255, 255, 255, 0.8);
-            border-radius: 12px;
-            box-shadow: 0 4px 15px rgba(0, 0, 0, 0.1);
-        }
-
-        blockquote {
-            padding-left: 45px;
-        }
-        
-        h1 {
-            font-size: 2.8rem;
-            margin-bottom: 10px;
-            color: #2c3e50;
-            background: linear-gradient(90deg, #3498db, #8e44ad);
-            -webkit-background-clip: text;
-            background-clip: text;
-            color: transparent;
-        }
-        h2 {
-            font-size: 2rem;
-            margin-bottom: 20px;
-            padding-bottom: 10px;
-            border-bottom: 2px solid #3498db;
-            color: #2c3e50;
-        }
-        
-        h3 {
-            font-size: 1.6rem;
-            margin: 25px 0 15px;
-            color: #2050aa;
-        }
-        
-        h4 {
-            font-size: 1.3rem;
-            margin: 20px 0 12px;
-            color: #9b59b6;
-        }
-        
-        h5 {
-            font-size: 1.1rem;
-            margin: 18px 0 10px;
-            color: #e67e22;
-        }
-        
-        h6 {
-            font-size: 1rem;
-            margin: 16px 0 8px;
-            color: #e74c3c;
-        }
-        
-        p {
-            margin-bottom: 15px;
-            font-size: 1.05rem;
-            color: #555;
-            line-height: 1.7;
-        }
-
-
-        .subtitle {
-            font-size: 1.2rem;
-            color: #7f8c8d;
-            max-width: 800px;
-            margin: 0 auto;
-        }
-        
-        /* 侧边栏样式 */
-        .sidebar {
-            flex: 0 0 280px;
-            background: rgba(255, 255, 255, 0.95);
-            border-radius: 12px;
-            padding: 25px 20px;
-            box-shadow: 0 8px 30px rgba(0, 0, 0, 0.12);
-            height: fit-content;
-            position: sticky;
-            top: 20px;
-            max-height: 90vh;
-            overflow-y: auto;
-        }
-        
-        .sidebar-title {
-            font-size: 1.6rem;
-            margin-bottom: 20px;
-            padding-bottom: 10px;
-            border-bottom: 2px solid #3498db;
-            color: #2c3e50;
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }
-        
-        .sidebar-title::before {
-            content: "📋";
-        }
-        
-        #toc {
-            list-style: none;
-            
-            padding-left: 0;
-        }
-        #toc ul {
-            list-style: none; /* 必须添加 */
-        }
-        
-        
-        #toc li {
-            margin-bottom: 8px;
-            transition: all 0.3s ease;
-        }
-        
-        #toc a {
-            text-decoration: none;
-            color: #34495e;
-            display: block;
-            padding: 8px 15px;
-            border-radius: 8px;
-            transition: all 0.2s ease;
-            font-weight: 500;
-        }
-        
-        #toc a:hover {
-            background: #e3f2fd;
-            color: #2980b9;
-            transform: translateX(5px);
-        }
-        #toc .h1 a::before { content: "■ "; color: #3498db; }
-        #toc .h2 a::before { content: "► "; color: #9b59b6; }
-        #toc .h3 a::before { content: "▸ "; color: #2ecc71; }
-        #toc .h1 a {
-            font-size: 1.2rem;
-            font-weight: 600;
-            color: #2980b9;
-            border-left: 4px solid #3498db;
-
-        }
-        
-        #toc .h2 a {
-            font-size: 1.1rem;
-            padding-left: 30px;
-            font-weight: normal;
-            color: #34495e;
-            font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
-            border-left: 3px solid #9b59b6;
-
-        }
-
-        #toc .h3 a {
-            font-size: 1rem;
-            padding-left: 45px;
-            color: #34495e;
-            font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
-            border-left: 2px solid #2ecc71;
-        }
-        
-        #toc .h4 a {
-            font-size: 0.95rem;
-            padding-left: 60px;
-            color: #34495e;
-            font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
-            border-left: 2px solid #f39c12;
-        }
-        
-        #toc .h5 a {
-            font-size: 0.9rem;
-            padding-left: 75px;
-            color: #34495e;
-            font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
-            border-left: 2px solid #e74c3c;
-        }
-        #toc .h6 a {
-            font-size: 0.85rem;
-            padding-left: 90px;
-            color: #34495e;
-            font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
-            border-left: 2px solid #e74c3c;
-        }
-
-        
-        /* 主内容区样式 */
-        .content {
-            flex: 1;
-            background: rgba(255, 255, 255, 0.95);
-            border-radius: 12px;
-            padding: 40px;
-            box-shadow: 0 8px 30px rgba(0, 0, 0, 0.12);
-        }
-        
-        .content-section {
-            margin-bottom: 50px;
-        }
-        
-        .content-section h2 {
-            font-size: 2rem;
-            margin-bottom: 20px;
-            padding-bottom: 10px;
-            border-bottom: 2px solid #3498db;
-            color: #2c3e50;
-        }
-        
-        .content-section h3 {
-            font-size: 1.6rem;
-            margin: 25px 0 15px;
-            color: #2980b9;
-        }
-        
-        .content-section h4 {
-            font-size: 1.3rem;
-            margin: 20px 0 12px;
-            color: #9b59b6;
-        }
-        
-        .content-section h5 {
-            font-size: 1.1rem;
-            margin: 18px 0 10px;
-            color: #e67e22;
-        }
-        
-        .content-section h6 {
-            font-size: 1rem;
-            margin: 16px 0 8px;
-            color: #e74c3c;
-        }
-        
-        .content-section p {
-            margin-bottom: 15px;
-            font-size: 1.05rem;
-            color: #555;
-            line-height: 1.7;
-        }
-        
-        .code-block {
-            background: #2c3e50;
-            color: #ecf0f1;
-            padding: 20px;
-            border-radius: 8px;
-            margin: 20px 0;
-            font-family: 'Courier New', monospace;
-            overflow-x: auto;
-        }
-        
-        .highlight {
-            background-color: rgba(255, 255, 0, 0.2);
-            padding: 2px 5px;
-            border-radius: 4px;
-        }
-        
-        /* 响应式设计 */
-        @media (max-width: 900px) {
-            .container {
-                flex-direction: column;
-            }
-            
-            .sidebar {
-                position: static;
-                width: 100%;
-            }
-        }
-        
-        .back-to-top {
-            position: fixed;
-            bottom: 30px;
-            right: 30px;
-            background: #3498db;
-            color: white;
-            width: 50px;
-            height: 50px;
-            border-radius: 50%;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 1.5rem;
-            cursor: pointer;
-            box-shadow: 0 4px 10px rgba(0, 0, 0, 0.2);
-            transition: all 0.3s ease;
-            opacity: 0;
-            transform: translateY(20px);
-            z-index: 100;
-        }
-        
-        .back-to-top.show {
-            opacity: 1;
-            transform: translateY(0);
-        }
-        
-        .back-to-top:hover {
-            background: #2980b9;
-            transform: scale(1.1);
-        }
-        
-        footer {
-            text-align: center;
-            margin-top: 40px;
-            padding: 20px;
-            color: #7f8c8d;
-            font-size: 0.9rem;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <aside class="sidebar">
-            <h2 class="sidebar-title">文档目录</h2>
-            <ul id="toc"></ul>
-        </aside>
-        
-        <main class="content">""")
-
-
-                    doc = Document(file_path)
-
-                    for para_idx, paragraph in enumerate(doc.paragraphs, 1):
-
-                        if len(paragraph.text) == 0:
-                            html_file.write("<br><br>\n")
-
-                        else:
-                            level = isTitle(paragraph)
-                            if level is not None:
-                                string_start = '<h' + str(level) + '>'
-                                string_end = '</h' + str(level) + '>'
-
-                                string = string_start + paragraph.text + string_end + '\n'
-                                html_file.write(string)
-
-                            else:
-                                # 获取三种缩进类型
-                                indent_types = [
-                                    ('左缩进', 'left_indent'),
-                                    ('首行缩进', 'first_line_indent'),
-                                    ('右缩进', 'right_indent')
-                                ]
-
-                                indent_values = []
-                                value = get_effective_indent_pt(paragraph, indent_types[0][1])
-
-                                n = math.floor(value/20)
-                                if n > 0:
-                                    string_start = '<blockquote>'*n
-                                    string_end = '</blockquote>'*n
-                                    string = string_start + paragraph.text + string_end
-                                else:
-                                    string = '<p>' + paragraph.text + '</p>'
-
-                                html_file.write(string+'\n')
-
-                    html_file.write("""        </main>
-    </div>
-    
-    <div class="back-to-top" id="backToTop">↑</div>
-    
-    <footer>
-        <p>已经到底啦</p>
-    </footer>
-    
-    <script>
-        document.addEventListener('DOMContentLoaded', function() {
-            // 生成目录
-            generateTOC();
-            
-            // 设置滚动高亮
-            window.addEventListener('scroll', highlightActiveHeading);
-            
-            // 初始化返回顶部按钮
-            initBackToTop();
-            
-            // 添加平滑滚动
-            addSmoothScrolling();
-
-            
-        });
-        
-        function generateTOC() {
-            const tocContainer = document.getElementById('toc');
-            const headings = document.querySelectorAll('.content h1, .content h2, .content h3, .content h4, .content h5, .content h6');
-            
-            // 用于跟踪当前层级
-            let currentLevel = 0;
-            // 目录栈，用于处理嵌套层级
-            const tocStack = [tocContainer];
-            
-            // 清空目录容器
-            tocContainer.innerHTML = '';
-            
-            // 遍历所有标题元素
-            headings.forEach((heading, index) => {
-                // 确保标题有ID
-                if (!heading.id) {
-                    heading.id = 'heading-' + index;
-                }
-                
-                // 获取标题级别（h1->1, h2->2, ...）
-                const level = parseInt(heading.tagName.substring(1));
-                
-                // 创建列表项
-                const li = document.createElement('li');
-                li.className = `h${level}`;
-                
-                // 创建链接
-                const a = document.createElement('a');
-                a.href = `#${heading.id}`;
-                a.textContent = heading.textContent;
-                a.dataset.level = level;
-                
-                li.appendChild(a);
-                
-                // 处理层级关系
-                if (level > currentLevel) {
-                    // 进入更深层级 - 创建新的ul
-                    const ul = document.createElement('ul');
-                    li.appendChild(ul);
-                    tocStack[tocStack.length - 1].appendChild(li);
-                    tocStack.push(ul);
-                } else if (level < currentLevel) {
-                    // 返回上层级 - 弹出栈
-                    const popCount = currentLevel - level;
-                    for (let i = 0; i < popCount; i++) {
-                        if (tocStack.length > 1) tocStack.pop();
-                    }
-                    tocStack[tocStack.length - 1].appendChild(li);
-                } else {
-                    // 同级 - 直接添加到当前ul
-                    tocStack[tocStack.length - 1].appendChild(li);
-                }
-                
-                // 更新当前层级
-                currentLevel = level;
-            });
-        }
-        
-        function highlightActiveHeading() {
-            const headings = document.querySelectorAll('.content h1, .content h2, .content h3, .content h4, .content h5, .content h6');
-            const tocLinks = document.querySelectorAll('#toc a');
-            
-            // 移除所有活动类
-            tocLinks.forEach(link => link.classList.remove('active'));
-            
-            // 找到当前视口最顶部的标题
-            let activeHeading = null;
-            let minDistance = Infinity;
-            
-            headings.forEach(heading => {
-                const rect = heading.getBoundingClientRect();
-                // 计算标题顶部与视口顶部的距离
-                const distance = rect.top;
-                
-                // 如果标题在视口顶部附近，且距离更小
-                if (distance >= 0 && distance < minDistance) {
-                    minDistance = distance;
-                    activeHeading = heading;
-                }
-            });
-            
-            // 高亮对应的目录项
-            if (activeHeading) {
-                const activeLink = document.querySelector(`#toc a[href="#${activeHeading.id}"]`);
-                if (activeLink) {
-                    activeLink.classList.add('active');
-                    
-                    // 滚动到活动链接位置
-                    activeLink.scrollIntoView({ behavior: 'smooth', block: 'nearest', inline: 'start' });
-                }
-            }
-            
-            // 处理返回顶部按钮
-            const backToTop = document.getElementById('backToTop');
-            if (window.scrollY > 300) {
-                backToTop.classList.add('show');
-            } else {
-                backToTop.classList.remove('show');
-            }
-        }
-        
-        function initBackToTop() {
-            const backToTop = document.getElementById('backToTop');
-            backToTop.addEventListener('click', () => {
-                window.scrollTo({
-                    top: 0,
-                    behavior: 'smooth'
-                });
-            });
-        }
-        
-        function addSmoothScrolling() {
-            // 为目录链接添加平滑滚动
-            document.querySelectorAll('#toc a').forEach(link => {
-                link.addEventListener('click', function(e) {
-                    e.preventDefault();
-                    const targetId = this.getAttribute('href');
-                    const targetElement = document.querySelector(targetId);
-                    
-                    if (targetElement) {
-                        window.scrollTo({
-                            top: targetElement.offsetTop - 30,
-                            behavior: 'smooth'
-                        });
-                        
-                        // 更新URL hash
-                        history.replaceState(null, null, targetId);
-                    }
-                });
-            });
-        }
-        
-    </script>
-</body>
-</html>""")
-                    html_file.close()
-
-                    # print_paragraph_indents(file_path)
-                    # analyze_headings(file_path)
-
-
-
-
-
-
-
-    # print_paragraph_indents(sys.argv[1])
\ No newline at end of file
+
+def apply_numbering(blocks, index):
+    """
+    功能 按文档顺序计算所有编号段落的标签
+    参数 blocks:Block列表 index:NumberingIndex
+    """
+    counter = ListCounter(index)
+    for block in blocks:
+        if block.numbering is None:
+            continue
+        result = counter.next(*block.numbering)
+        if result is None:
+            # numId在numbering.xml里找不到，当作普通段落处理
+            if block.kind == BLOCK_LIST_ITEM:
+                block.kind = BLOCK_PARAGRAPH
+            continue
+        block.label, block.ordered = result
+
+
+def _write_atomic(path, content):
+    """
+    功能 先写到临时文件，全部写完再替换，转换中途失败或被杀掉时不会留下半个文件
+    """
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # 写入或替换失败时删掉临时文件，不留下残留
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+# 每个进程内按缓存目录共享的样式表缓存，批量转换时同一个子进程处理的所有文档共用
+_style_caches = {}
+
+
+def get_style_cache(style_cache_dir=None):
+    """
+    功能 取当前进程内对应缓存目录的StyleTableCache，style_cache_dir为None时只在内存中缓存
+    """
+    style_cache = _style_caches.get(style_cache_dir)
+    if style_cache is None:
+        style_cache = _style_caches[style_cache_dir] = StyleTableCache(style_cache_dir)
+    return style_cache
+
+
+def convert_document(file_path, html_file_path, formats=('html',), style_cache_dir=None, site_root=None,
+                     minify=False, data=None):
+    """
+    功能 把一个docx文档转换成html文件，同一次解析还可以输出其它格式
+    参数 file_path:docx路径 html_file_path:输出的html路径，其它格式的文件与它同名、后缀不同
+         formats:输出格式列表，取值见RENDERERS
+         style_cache_dir:样式表缓存的目录，为None时样式表只在本进程内存中缓存
+         site_root:从html所在目录到站点根目录的相对路径，设置后html会注册离线浏览用的service worker
+         minify:输出压缩后的html，去掉模板中的注释和空白，正文块之间不换行
+         data:已经读入内存的docx内容，传入时直接从内存解析，不再按路径打开文件
+    """
+    outputs = render_document(file_path, formats, style_cache_dir, site_root, minify, data)
+    write_outputs(html_file_path, outputs)
+
+
+def render_document(file_path, formats=('html',), style_cache_dir=None, site_root=None, minify=False, data=None):
+    """
+    功能 解析docx并渲染出各个格式的内容，不写文件
+    参数 同convert_document
+    返回 [(文件后缀, 内容)]
+    """
+    title = os.path.splitext(os.path.basename(file_path))[0]
+
+    # zip包需要反复随机读取，网络盘上按路径打开会产生大量小的读请求，内存里的字节串没有这个开销
+    doc = Document(io.BytesIO(data) if data is not None else file_path)
+    blocks = parse_blocks(doc, get_style_cache(style_cache_dir))
+    apply_numbering(blocks, read_numbering_index(doc))
+    resolve_links(blocks, build_anchor_index(blocks, BLOCK_HEADING))
+
+    renderers = [HtmlRenderer(site_root, minify) if fmt == 'html' else RENDERERS[fmt]() for fmt in formats]
+    outputs = render_blocks(title, blocks, renderers)
+    return [(renderer.suffix, content) for renderer, content in zip(renderers, outputs)]
+
+
+def write_outputs(html_file_path, outputs):
+    """
+    功能 把render_document的结果写到html旁边
+    """
+    os.makedirs(os.path.dirname(html_file_path), exist_ok=True)
+    base_path = os.path.splitext(html_file_path)[0]
+    for suffix, content in outputs:
+        _write_atomic(base_path + suffix, content)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='把目录下的docx文档批量转换成html')
+    parser.add_argument('root', nargs='?', default=os.getcwd(),
+                        help='扫描的根目录，默认当前工作目录')
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                        help='包含的文件glob模式，可重复，默认 ' + ' '.join(DEFAULT_INCLUDE))
+    parser.add_argument('--exclude', action='append', metavar='GLOB',
+                        help='追加排除的文件/目录glob模式，可重复')
+    parser.add_argument('--no-default-excludes', action='store_true',
+                        help='不使用默认排除列表 ' + ' '.join(DEFAULT_EXCLUDE))
+    parser.add_argument('--output-root', metavar='DIR',
+                        help='html输出根目录，按相对路径镜像目录结构。默认写在docx旁边')
+    parser.add_argument('--follow-symlinks', action='store_true',
+                        help='进入符号链接目录（会检测链接成环）')
+    parser.add_argument('--incremental', action='store_true',
+                        help='html比docx新时跳过该文档')
+    parser.add_argument('--formats', default='html', metavar='LIST',
+                        help='逗号分隔的输出格式，可选 ' + ','.join(RENDERERS) + '，默认html')
+    parser.add_argument('--style-cache', metavar='DIR',
+                        help='样式表缓存目录。展开后的样式表按styles.xml摘要保存，在并行子进程和多次运行之间共享，'
+                             '不设置时只在每个进程的内存里缓存')
+    parser.add_argument('--offline', action='store_true',
+                        help='页面注册站点根目录下的service worker，配合generate_index.py --offline离线浏览')
+    parser.add_argument('--minify', action='store_true',
+                        help='输出压缩的html：去掉模板中的注释和多余空白，正文不换行')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='并行转换的子进程数，默认1')
+    parser.add_argument('--timeout', type=float, metavar='SECONDS',
+                        help='单个文档的最长转换时间，超时的文档被杀掉并跳过')
+    parser.add_argument('--max-memory', type=int, metavar='MB',
+                        help='单个转换子进程的内存上限(MB)，超限的文档被跳过，仅Linux/macOS生效')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='流水线模式：I/O线程提前读入后面的文档，后台线程写出结果，读写和转换同时进行')
+    parser.add_argument('--io-threads', type=int, default=4,
+                        help='流水线模式下读文件的线程数，默认4')
+    parser.add_argument('--pipeline-memory', type=int, default=256, metavar='MB',
+                        help='流水线模式下预读内容和待写结果合计的内存预算(MB)，默认256')
+    parser.add_argument('--failures', metavar='FILE',
+                        help='把转换失败的文档及原因写入该文件')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    exclude = [] if args.no_default_excludes else list(DEFAULT_EXCLUDE)
+    exclude.extend(args.exclude or [])
+
+    # 遍历根目录及所有子目录
+    entries = discover_documents(
+        args.root,
+        include=args.include,
+        exclude=exclude,
+        output_root=args.output_root,
+        follow_symlinks=args.follow_symlinks,
+    )
+
+    if args.incremental:
+        entries = [entry for entry in entries if not entry.is_up_to_date()]
+    formats = tuple(fmt.strip() for fmt in args.formats.split(',') if fmt.strip())
+    for fmt in formats:
+        if fmt not in RENDERERS:
+            sys.exit(f"未知的输出格式: {fmt}")
+    site_root = os.path.abspath(args.output_root or args.root)
+    tasks = []
+    for entry in entries:
+        root_prefix = None
+        if args.offline:
+            root_prefix = site_root_prefix(os.path.dirname(entry.html_path), site_root)
+        tasks.append((entry.path, entry.html_path, formats, args.style_cache, root_prefix, args.minify))
+
+    failures = []
+    isolated = args.jobs > 1 or args.timeout or args.max_memory
+    if args.pipeline:
+        budget = MemoryBudget(args.pipeline_memory * 1024 * 1024)
+        sources = prefetch(
+            ((task, entry.path, entry.size) for task, entry in zip(tasks, entries)),
+            budget, threads=args.io_threads,
+        )
+        if isolated:
+            # 主进程负责预读，子进程直接从内存转换并写出
+            results = _run_isolated_pipelined(sources, args)
+        else:
+            results = _run_pipelined(sources, budget)
+    elif isolated:
+        # 每个文档在隔离的子进程里转换，病态文档只会拖垮自己
+        results = run_isolated(tasks, convert_document, jobs=args.jobs,
+                               timeout=args.timeout, memory_limit_mb=args.max_memory)
+    else:
+        results = _run_inline(tasks)
+
+    for (file_path, html_file_path, *_), error in results:
+        # 打印绝对路径
+        print(file_path)
+        print(html_file_path)
+        if error is not None:
+            print(f"转换失败: {error}")
+            failures.append((file_path, error))
+
+        # print_paragraph_indents(file_path)
+        # analyze_headings(file_path)
+
+    if failures:
+        print(f"\n共 {len(failures)} 个文档转换失败:")
+        for file_path, error in failures:
+            print(f"  {file_path}: {error}")
+    if args.failures:
+        with open(args.failures, 'w', encoding='utf-8') as f:
+            for file_path, error in failures:
+                f.write(f"{file_path}\t{error}\n")
+
+
+def _run_inline(tasks):
+    """
+    功能 在当前进程里逐个转换，与run_isolated产出相同格式的(task, error)
+    """
+    for task in tasks:
+        try:
+            convert_document(*task)
+        except Exception as e:
+            yield task, f"{type(e).__name__}: {e}"
+        else:
+            yield task, None
+
+
+def _run_pipelined(sources, budget):
+    """
+    功能 流水线模式：当前线程只做转换，读文件和写文件分别在I/O线程和写出线程里进行
+    参数 sources:prefetch的返回值 budget:与prefetch共用的MemoryBudget
+    """
+    writer = AsyncWriter(budget, lambda task, outputs: write_outputs(task[1], outputs))
+    try:
+        for task, data, error in sources:
+            if error is not None:
+                yield task, error
+                continue
+            file_path, html_file_path, formats, style_cache_dir, site_root, minify = task
+            try:
+                outputs = render_document(file_path, formats, style_cache_dir, site_root, minify, data)
+            except Exception as e:
+                yield task, f"{type(e).__name__}: {e}"
+                continue
+            writer.submit(task, outputs, sum(len(content) for _, content in outputs))
+            # 只有写完的文档才算转换完成，写失败的只报告一次失败
+            yield from writer.completed()
+    finally:
+        remaining = writer.close()
+    yield from remaining
+
+
+def _run_isolated_pipelined(sources, args):
+    """
+    功能 流水线模式与隔离子进程同时使用：读入的内容随任务发给子进程
+    """
+    read_failures = []
+
+    def tasks():
+        for task, data, error in sources:
+            if error is not None:
+                read_failures.append((task, error))
+            else:
+                yield task + (data,)
+
+    for task, error in run_isolated(tasks(), convert_document, jobs=args.jobs,
+                                    timeout=args.timeout, memory_limit_mb=args.max_memory):
+        yield task, error
+    yield from read_failures
+
+
+if __name__ == "__main__":
+    main()
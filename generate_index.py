@@ -1,57 +1,43 @@
 import os
+import re
+import argparse
 from pathlib import Path
 
+from offline import register_script, site_root_prefix, write_offline_site
+from minify import minify_html
 
-def generate_index_html(directory):
-    # 获取当前目录展示名称
-    dir_name = directory.name if directory != Path.cwd() else "Root Directory"
 
-    # 收集有效子目录链接（仅包含已生成index.html的）
-    subdir_links = []
-    for item in directory.iterdir():
-        if item.is_dir() and (item / "index.html").exists():
-            rel_path = os.path.relpath(item / "index.html", directory)
-            subdir_links.append((item.name, rel_path, 'dir'))
-
-    # 收集同级HTML文件（排除自身）
-    file_links = []
-    for item in directory.iterdir():
-        if item.is_file() and item.suffix == ".html" and item.name != "index.html":
-            file_links.append((item.stem, item.name, 'file'))
+# 索引页模板，__名称__ 为占位符，生成时一次替换，目录名中出现占位符文本也不会被再次替换
+PLACEHOLDER = re.compile(r'__(TITLE|COUNT|LINKS)__')
 
-    # 合并并排序链接（目录在前，文件在后）
-    all_links = sorted(subdir_links, key=lambda x: x[0].lower()) + \
-                sorted(file_links, key=lambda x: x[0].lower())
-
-    # 生成HTML内容
-    html_content = f"""<!DOCTYPE html>
+INDEX_TEMPLATE = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{dir_name} - 索引</title>
+    <title>__TITLE__ - 索引</title>
     <style>
-        :root {{
+        :root {
             --bg-color: #ffffff;
             --text-color: #2d3748;
             --accent-color: #4a5568;
             --border-color: #e2e8f0;
             --dir-color: #2b6cb0;
             --file-color: #718096;
-        }}
+        }
 
-        @media (prefers-color-scheme: dark) {{
-            :root {{
+        @media (prefers-color-scheme: dark) {
+            :root {
                 --bg-color: #1a202c;
                 --text-color: #e2e8f0;
                 --accent-color: #a0aec0;
                 --border-color: #4a5568;
                 --dir-color: #63b3ed;
                 --file-color: #a0aec0;
-            }}
-        }}
+            }
+        }
 
-        body {{
+        body {
             font-family: 'Segoe UI', system-ui, -apple-system, sans-serif;
             line-height: 1.6;
             margin: 2rem auto;
@@ -59,98 +45,167 @@ def generate_index_html(directory):
             padding: 0 1rem;
             color: var(--text-color);
             background-color: var(--bg-color);
-        }}
+        }
 
-        .header {{
+        .header {
             padding-bottom: 1.5rem;
             margin-bottom: 2rem;
             border-bottom: 2px solid var(--border-color);
-        }}
+        }
 
-        .title {{
+        .title {
             font-size: 1.875rem;
             margin: 0 0 0.5rem;
             color: var(--accent-color);
-        }}
+        }
 
-        .count {{
+        .count {
             color: var(--file-color);
             font-size: 0.875rem;
-        }}
+        }
 
-        .link-list {{
+        .link-list {
             list-style: none;
             padding: 0;
             margin: 0;
-        }}
+        }
 
-        .link-item {{
+        .link-item {
             padding: 0.75rem;
             margin: 0.5rem 0;
             border-radius: 0.375rem;
             transition: all 0.2s ease;
             background: var(--bg-color);
             border: 1px solid var(--border-color);
-        }}
+        }
 
-        .link-item:hover {{
+        .link-item:hover {
             transform: translateX(4px);
             border-color: var(--dir-color);
-        }}
+        }
 
-        .link-item a {{
+        .link-item a {
             text-decoration: none;
             display: flex;
             align-items: center;
             gap: 0.75rem;
-        }}
+        }
 
-        .link-item[data-type="dir"] {{
+        .link-item[data-type="dir"] {
             border-left: 4px solid var(--dir-color);
-        }}
+        }
 
-        .link-item[data-type="dir"] a::before {{
+        .link-item[data-type="dir"] a::before {
             content: "📁";
             font-size: 1.2em;
             color: var(--dir-color);
-        }}
+        }
 
-        .link-item[data-type="file"] {{
+        .link-item[data-type="file"] {
             border-left: 4px solid var(--file-color);
-        }}
+        }
 
-        .link-item[data-type="file"] a::before {{
+        .link-item[data-type="file"] a::before {
             content: "📄";
             font-size: 1.2em;
             color: var(--file-color);
-        }}
+        }
     </style>
 </head>
 <body>
     <div class="header">
-        <h1 class="title">{dir_name}</h1>
-        <p class="count">共 {len(all_links)} 个项目</p>
+        <h1 class="title">__TITLE__</h1>
+        <p class="count">共 __COUNT__ 个项目</p>
     </div>
 
     <ul class="link-list">
-        {"".join(
+        __LINKS__
+    </ul>__OFFLINE__
+</body>
+</html>"""
+
+# 按(是否压缩, 站点根目录前缀)缓存的模板，整次运行只生成一次
+_page_templates = {}
+
+
+def page_template(minify=False, root_prefix=None):
+    """
+    功能 取索引页模板
+    参数 minify:是否去掉模板中的注释和多余空白
+         root_prefix:回到站点根目录的相对路径前缀，设置后注册service worker
+    """
+    key = (minify, root_prefix)
+    template = _page_templates.get(key)
+    if template is None:
+        offline_script = register_script(root_prefix) if root_prefix is not None else ""
+        template = INDEX_TEMPLATE.replace('__OFFLINE__', offline_script)
+        if minify:
+            template = minify_html(template)
+        _page_templates[key] = template
+    return template
+
+
+def generate_index_html(directory, offline=False, minify=False, root=None):
+    # 站点根目录，默认当前工作目录
+    root = Path.cwd() if root is None else root
+
+    # 获取当前目录展示名称
+    dir_name = directory.name if directory != root else "Root Directory"
+
+    # 收集有效子目录链接（仅包含已生成index.html的）
+    subdir_links = []
+    for item in directory.iterdir():
+        if item.is_dir() and (item / "index.html").exists():
+            rel_path = os.path.relpath(item / "index.html", directory)
+            subdir_links.append((item.name, rel_path, 'dir'))
+
+    # 收集同级HTML文件（排除自身）
+    file_links = []
+    for item in directory.iterdir():
+        if item.is_file() and item.suffix == ".html" and item.name != "index.html":
+            file_links.append((item.stem, item.name, 'file'))
+
+    # 合并并排序链接（目录在前，文件在后）
+    # 只有大小写不同的名称再按原名排序，不依赖iterdir的返回顺序，保证每次生成的内容相同
+    all_links = sorted(subdir_links, key=lambda x: (x[0].lower(), x[0])) + \
+                sorted(file_links, key=lambda x: (x[0].lower(), x[0]))
+
+    # 离线模式下注册站点根目录的service worker
+    root_prefix = site_root_prefix(directory, root) if offline else None
+
+    # 生成HTML内容
+    links = "".join(
         f'<li class="link-item" data-type="{link_type}">'
         f'<a href="{path}">{name}</a>'
         f'</li>'
         for name, path, link_type in all_links
-    )}
-    </ul>
-</body>
-</html>"""
+    )
+    values = {'TITLE': dir_name, 'COUNT': str(len(all_links)), 'LINKS': links}
+    html_content = PLACEHOLDER.sub(lambda m: values[m.group(1)], page_template(minify, root_prefix))
 
     # 写入文件
     (directory / "index.html").write_text(html_content, encoding="utf-8")
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='为目录树的每个目录生成index.html')
+    parser.add_argument('root', nargs='?', default=os.getcwd(),
+                        help='站点根目录，默认当前工作目录。与generate_html.py的输出根目录'
+                             '(--output-root，未设置时为扫描根目录)一致，离线模式下页面才能找到sw.js')
+    parser.add_argument('--offline', action='store_true',
+                        help='同时生成站点导航清单和service worker，支持缓存和离线浏览')
+    parser.add_argument('--minify', action='store_true',
+                        help='输出压缩的html：去掉模板中的注释和多余空白')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    site_root = Path(os.path.abspath(args.root))
+
     # 获取所有需要处理的目录（按深度倒序处理）
     directories = []
-    for root, _, _ in os.walk(os.getcwd()):
+    for root, _, _ in os.walk(site_root):
         directories.append(Path(root))
 
     # 按目录深度排序（从最深开始处理）
@@ -164,10 +219,15 @@ def main():
             for item in directory.iterdir()
         )
 
-        if has_content or directory == Path.cwd():
-            generate_index_html(directory)
+        if has_content or directory == site_root:
+            generate_index_html(directory, offline=args.offline, minify=args.minify, root=site_root)
             print(f"生成目录索引：{directory}")
 
+    if args.offline:
+        # 所有索引页生成之后再计算清单，保证哈希是最终内容的
+        manifest = write_offline_site(site_root)
+        print(f"生成导航清单：{len(manifest['pages'])} 个文档，{len(manifest['indexes'])} 个索引")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
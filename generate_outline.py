@@ -0,0 +1,171 @@
+import os
+import sys
+import csv
+import json
+import zipfile
+import argparse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+from discovery import discover_documents, DEFAULT_INCLUDE, DEFAULT_EXCLUDE
+from docx_xml import W_BODY, W_P, read_style_outline_levels, paragraph_text, paragraph_outline_level
+from blocks import Block, BLOCK_HEADING, BLOCK_PARAGRAPH, JsonOutlineRenderer
+
+
+def extract_outline(file_path):
+    """
+    功能 不构建python-docx对象模型，直接流式扫描word/document.xml提取标题大纲
+    参数 file_path:docx路径
+    返回 与JsonOutlineRenderer相同结构的字典，另外附带flat列表(段落序号, 级别, 标题)
+    """
+    with zipfile.ZipFile(file_path) as package:
+        try:
+            styles_xml = package.read('word/styles.xml')
+        except KeyError:
+            styles_xml = None
+        style_levels, default_style_id = read_style_outline_levels(styles_xml)
+
+        renderer = JsonOutlineRenderer()
+        renderer.start(os.path.splitext(os.path.basename(file_path))[0])
+        flat = []
+
+        with package.open('word/document.xml') as document_xml:
+            depth = 0
+            body = None
+            index = 0
+            for event, elem in ET.iterparse(document_xml, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    if depth == 2 and elem.tag == W_BODY:
+                        body = elem
+                    continue
+                depth -= 1
+                # 只处理body下的直接段落，与doc.paragraphs一致，表格和文本框里的段落跳过
+                if depth != 2 or elem.tag != W_P:
+                    continue
+
+                index += 1
+                text = paragraph_text(elem)
+                level = None
+                # 空行不算标题，与isTitle一致
+                if text.strip() != '':
+                    level = paragraph_outline_level(elem, style_levels, default_style_id)
+
+                if level is not None:
+                    renderer.block(Block(BLOCK_HEADING, level=level, spans=(text,)))
+                    flat.append((index, level, text.strip()))
+                elif len(text) > 0:
+                    renderer.block(Block(BLOCK_PARAGRAPH, spans=(text,)))
+
+                # 处理完的段落立刻释放，大文档也只占用很少的内存
+                if body is not None:
+                    body.clear()
+
+    outline = json.loads(renderer.finish())
+    outline['flat'] = flat
+    return outline
+
+
+def _extract_one(task):
+    """
+    功能 子进程里提取一个文档的大纲，出错时返回错误信息而不是抛出
+    """
+    file_path, rel_path = task
+    try:
+        return rel_path, extract_outline(file_path), None
+    except Exception as e:
+        return rel_path, None, f"{type(e).__name__}: {e}"
+
+
+def write_outline(path, outline, fmt):
+    """
+    功能 把一个文档的大纲写成json或csv文件
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if fmt == 'json':
+        data = {key: value for key, value in outline.items() if key != 'flat'}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['paragraph', 'level', 'title'])
+            writer.writerows(outline['flat'])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='只提取docx的标题大纲，不做完整转换')
+    parser.add_argument('root', nargs='?', default=os.getcwd(),
+                        help='扫描的根目录，默认当前工作目录')
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                        help='包含的文件glob模式，可重复，默认 ' + ' '.join(DEFAULT_INCLUDE))
+    parser.add_argument('--exclude', action='append', metavar='GLOB',
+                        help='追加排除的文件/目录glob模式，可重复')
+    parser.add_argument('--no-default-excludes', action='store_true',
+                        help='不使用默认排除列表 ' + ' '.join(DEFAULT_EXCLUDE))
+    parser.add_argument('--output-root', metavar='DIR',
+                        help='大纲文件输出根目录，默认写在docx旁边')
+    parser.add_argument('--format', choices=['json', 'csv'], default='json',
+                        help='输出格式，默认json')
+    parser.add_argument('--combined', metavar='FILE',
+                        help='把所有文档的大纲合并写入一个报告文件，不再逐个输出')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='并行的进程数，默认CPU核数')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    exclude = [] if args.no_default_excludes else list(DEFAULT_EXCLUDE)
+    exclude.extend(args.exclude or [])
+
+    entries = discover_documents(
+        args.root,
+        include=args.include,
+        exclude=exclude,
+        output_root=args.output_root,
+    )
+    paths = {entry.rel_path: entry for entry in entries}
+    tasks = [(entry.path, entry.rel_path) for entry in entries]
+
+    suffix = '.outline.' + args.format
+    combined = []
+    failures = []
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        # chunksize让每个进程一次拿一批小任务，减少进程间通信
+        chunksize = max(1, len(tasks) // (max(1, args.jobs) * 8))
+        for rel_path, outline, error in executor.map(_extract_one, tasks, chunksize=chunksize):
+            if error is not None:
+                print(f"提取失败: {rel_path} ({error})")
+                failures.append(rel_path)
+                continue
+            if args.combined:
+                combined.append((rel_path, outline))
+            else:
+                html_path = paths[rel_path].html_path
+                write_outline(os.path.splitext(html_path)[0] + suffix, outline, args.format)
+
+    if args.combined:
+        os.makedirs(os.path.dirname(os.path.abspath(args.combined)), exist_ok=True)
+        if args.format == 'json':
+            report = {}
+            for rel_path, outline in combined:
+                report[rel_path] = {key: value for key, value in outline.items() if key != 'flat'}
+            with open(args.combined, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        else:
+            with open(args.combined, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['file', 'paragraph', 'level', 'title'])
+                for rel_path, outline in combined:
+                    for row in outline['flat']:
+                        writer.writerow((rel_path,) + tuple(row))
+
+    print(f"共处理 {len(tasks)} 个文档，失败 {len(failures)} 个")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import time
+import multiprocessing
+from multiprocessing.connection import wait
+
+try:
+    import resource
+except ImportError:
+    # Windows没有resource模块，内存限制不生效，只有超时限制
+    resource = None
+
+
+class _Worker:
+    """
+    功能 一个常驻的转换子进程。正常情况下一直复用，超时或崩溃时才被杀掉重建
+    """
+
+    def __init__(self, ctx, func, memory_limit_mb):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, func, memory_limit_mb),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.task = None
+        self.deadline = None
+
+    def submit(self, task, timeout):
+        self.task = task
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.conn.send(task)
+
+    def finish(self):
+        task = self.task
+        self.task = None
+        self.deadline = None
+        return task
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def _worker_main(conn, func, memory_limit_mb):
+    """
+    功能 子进程主循环：逐个接收任务并执行，None表示退出
+    """
+    if memory_limit_mb and resource is not None:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        try:
+            func(*task)
+        except MemoryError:
+            conn.send((f"内存超过 {memory_limit_mb}MB 限制", True))
+            # 内存耗尽后进程状态不可靠，直接退出，由主进程重建
+            return
+        except Exception as e:
+            conn.send((f"{type(e).__name__}: {e}", False))
+        else:
+            conn.send((None, False))
+
+
+def run_isolated(tasks, func, jobs=1, timeout=None, memory_limit_mb=None):
+    """
+    功能 在隔离的子进程中逐个执行func(*task)，单个任务超时、内存超限或崩溃时杀掉对应子进程，其余任务继续
+    参数 tasks:任务参数元组的可迭代对象
+         func:模块级函数，需要能被pickle，子进程用forkserver或spawn启动，会重新导入func所在模块
+         jobs:并行的子进程数
+         timeout:单个任务的最长运行秒数，None表示不限
+         memory_limit_mb:单个子进程的地址空间上限(MB)，None表示不限，仅POSIX生效
+    返回 生成器，按完成顺序产出(task, error)，成功时error为None
+    """
+    # 不用fork：流水线模式下主进程里有预读线程在运行，fork出的子进程可能继承被占用的锁而死锁。
+    # forkserver的服务进程是单线程的，每个子进程从它fork出来；没有forkserver的平台用spawn
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    pending = iter(tasks)
+    workers = [_Worker(ctx, func, memory_limit_mb) for _ in range(max(1, jobs))]
+    busy = {}
+
+    def dispatch(worker):
+        task = next(pending, None)
+        if task is not None:
+            worker.submit(task, timeout)
+            busy[worker.conn] = worker
+            busy[worker.process.sentinel] = worker
+
+    def replace(worker):
+        del busy[worker.conn]
+        del busy[worker.process.sentinel]
+        worker.kill()
+        new_worker = _Worker(ctx, func, memory_limit_mb)
+        workers[workers.index(worker)] = new_worker
+        return new_worker
+
+    try:
+        for worker in workers:
+            dispatch(worker)
+
+        while busy:
+            deadlines = [w.deadline for w in set(busy.values()) if w.deadline is not None]
+            wait_time = None
+            if deadlines:
+                wait_time = max(0.0, min(deadlines) - time.monotonic())
+
+            ready = wait(list(busy), wait_time)
+
+            handled = set()
+            for obj in ready:
+                worker = busy.get(obj)
+                if worker is None or worker in handled:
+                    continue
+                handled.add(worker)
+                if worker.conn.poll():
+                    try:
+                        error, exiting = worker.conn.recv()
+                    except EOFError:
+                        error, exiting = None, True
+                else:
+                    error, exiting = None, True
+                if error is None and exiting:
+                    # 子进程崩溃，例如段错误或被系统OOM杀掉
+                    worker.process.join(1)
+                    error = f"子进程异常退出 (exitcode={worker.process.exitcode})"
+                task = worker.finish()
+                if exiting:
+                    worker = replace(worker)
+                else:
+                    del busy[worker.conn]
+                    del busy[worker.process.sentinel]
+                yield task, error
+                dispatch(worker)
+
+            now = time.monotonic()
+            for worker in set(busy.values()):
+                if worker in handled or worker.deadline is None or worker.deadline > now:
+                    continue
+                task = worker.finish()
+                worker = replace(worker)
+                yield task, f"超过 {timeout} 秒时间限制"
+                dispatch(worker)
+    finally:
+        for worker in workers:
+            worker.stop()
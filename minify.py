@@ -0,0 +1,108 @@
+import re
+
+
+# 压缩只作用于本项目自己的页面模板：模板里的CSS/JS不含正则字面量，
+# 字符串和模板字符串原样保留，只去掉注释和不影响含义的空白
+
+_STRING = r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\''
+
+_CSS_COMMENT = re.compile('(' + _STRING + r')|/\*.*?\*/', re.S)
+_CSS_SPACE = re.compile('(' + _STRING + r')|\s+')
+_CSS_LAST_SEMICOLON = re.compile('(' + _STRING + r')|;(?=\})')
+
+_JS_COMMENT = re.compile('(' + _STRING + r'|`(?:\\.|[^`\\])*`)|//[^\n]*|/\*.*?\*/', re.S)
+_JS_SPACE = re.compile('(' + _STRING + r'|`(?:\\.|[^`\\])*`)|\s+')
+
+_HTML_TOKEN = re.compile(
+    r'<!--.*?-->'
+    r'|(<style\b[^>]*>)(.*?)(</style>)'
+    r'|(<script\b[^>]*>)(.*?)(</script>)'
+    r'|\s+',
+    re.S | re.I,
+)
+
+# CSS中这些字符两侧的空白可以去掉；冒号前的空白是后代选择器(a :hover)，不能去掉
+_CSS_TIGHT_BEFORE = set('{};,>)')
+_CSS_TIGHT_AFTER = set('{};:,>(')
+
+# JS换行之后或之前是这些字符时，换行不会触发自动补分号，可以去掉
+_JS_NEWLINE_AFTER = set('{(,;[')
+_JS_NEWLINE_BEFORE = set('})],;.')
+
+
+def _neighbours(match):
+    text = match.string
+    before = text[match.start() - 1] if match.start() > 0 else ''
+    after = text[match.end()] if match.end() < len(text) else ''
+    return before, after
+
+
+def _is_word(char):
+    return char.isalnum() or char in '_$' or ord(char) > 127
+
+
+def minify_css(css):
+    """
+    功能 去掉CSS中的注释和多余空白，以及每条规则最后一个分号
+    """
+    css = _CSS_COMMENT.sub(lambda m: m.group(1) or ' ', css)
+
+    def space(m):
+        if m.group(1):
+            return m.group(1)
+        before, after = _neighbours(m)
+        if not before or not after or before in _CSS_TIGHT_AFTER or after in _CSS_TIGHT_BEFORE:
+            return ''
+        return ' '
+
+    css = _CSS_SPACE.sub(space, css)
+    return _CSS_LAST_SEMICOLON.sub(lambda m: m.group(1) or '', css)
+
+
+def minify_js(js):
+    """
+    功能 去掉JS中的注释和多余空白
+    可能触发自动补分号的换行保留为一个换行符，不改变代码含义
+    """
+    js = _JS_COMMENT.sub(lambda m: m.group(1) or ' ', js)
+
+    def space(m):
+        if m.group(1):
+            return m.group(1)
+        before, after = _neighbours(m)
+        if not before or not after:
+            return ''
+        if '\n' in m.group():
+            if before in _JS_NEWLINE_AFTER or after in _JS_NEWLINE_BEFORE:
+                return ''
+            return '\n'
+        # a + +b、a - -b 中间的空格不能去掉
+        if _is_word(before) and _is_word(after) or before == after and before in '+-':
+            return ' '
+        return ''
+
+    return _JS_SPACE.sub(space, js)
+
+
+def minify_html(text):
+    """
+    功能 压缩html模板片段：去掉注释，内嵌的<style>/<script>分别按CSS/JS压缩，
+         标签之间的换行缩进全部去掉，行内的连续空白合并成一个空格
+    参数 text:模板片段，可以是不完整的页面(如只有页面开头或结尾)
+    返回 压缩后的片段，相同的输入总是得到相同的输出
+    """
+    def token(m):
+        if m.group(1):
+            return m.group(1) + minify_css(m.group(2)) + m.group(3)
+        if m.group(4):
+            return m.group(4) + minify_js(m.group(5)) + m.group(6)
+        if m.group().startswith('<!--'):
+            return ''
+        before, after = _neighbours(m)
+        if not before or not after:
+            return ''
+        if '\n' in m.group() and (before == '>' or after == '<'):
+            return ''
+        return ' '
+
+    return _HTML_TOKEN.sub(token, text)
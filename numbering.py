@@ -0,0 +1,193 @@
+from docx_xml import W, W_VAL, W_NUMID, W_ILVL
+
+
+W_ABSTRACT_NUM = W + 'abstractNum'
+W_ABSTRACT_NUM_ID = W + 'abstractNumId'
+W_NUM = W + 'num'
+W_LVL = W + 'lvl'
+W_START = W + 'start'
+W_NUM_FMT = W + 'numFmt'
+W_LVL_TEXT = W + 'lvlText'
+W_IS_LGL = W + 'isLgl'
+W_LVL_OVERRIDE = W + 'lvlOverride'
+W_START_OVERRIDE = W + 'startOverride'
+
+# Word最多9级列表
+MAX_LEVELS = 9
+
+CHINESE_DIGITS = '零一二三四五六七八九'
+IDEOGRAPH_TRADITIONAL = '甲乙丙丁戊己庚辛壬癸'
+ROMAN = [(1000, 'm'), (900, 'cm'), (500, 'd'), (400, 'cd'), (100, 'c'), (90, 'xc'),
+         (50, 'l'), (40, 'xl'), (10, 'x'), (9, 'ix'), (5, 'v'), (4, 'iv'), (1, 'i')]
+
+
+class Level:
+    """
+    功能 列表某一级的格式定义
+    start:起始编号 fmt:编号格式(numFmt) text:编号模板(lvlText，如%1.%2) legal:是否强制使用阿拉伯数字(isLgl)
+    """
+    __slots__ = ('start', 'fmt', 'text', 'legal')
+
+    def __init__(self, start, fmt, text, legal):
+        self.start = start
+        self.fmt = fmt
+        self.text = text
+        self.legal = legal
+
+
+def _parse_levels(parent):
+    levels = {}
+    for lvl in parent.findall(W_LVL):
+        ilvl = int(lvl.get(W_ILVL, '0'))
+        start = lvl.find(W_START)
+        fmt = lvl.find(W_NUM_FMT)
+        text = lvl.find(W_LVL_TEXT)
+        levels[ilvl] = Level(
+            start=int(start.get(W_VAL)) if start is not None else 1,
+            fmt=fmt.get(W_VAL) if fmt is not None else 'decimal',
+            text=text.get(W_VAL, '') if text is not None else '',
+            legal=lvl.find(W_IS_LGL) is not None,
+        )
+    return levels
+
+
+class NumberingIndex:
+    """
+    功能 word/numbering.xml的索引，每个文档只解析一次
+    abstracts:abstractNumId->{ilvl: Level} nums:numId->(abstractNumId, {ilvl: 起始编号覆盖}, {ilvl: 覆盖的Level})
+    """
+
+    def __init__(self, numbering_element=None):
+        self.abstracts = {}
+        self.nums = {}
+        if numbering_element is None:
+            return
+        for abstract in numbering_element.iter(W_ABSTRACT_NUM):
+            self.abstracts[abstract.get(W_ABSTRACT_NUM_ID)] = _parse_levels(abstract)
+        for num in numbering_element.iter(W_NUM):
+            abstract_id = num.find(W_ABSTRACT_NUM_ID)
+            if abstract_id is None:
+                continue
+            starts = {}
+            levels = {}
+            for override in num.findall(W_LVL_OVERRIDE):
+                ilvl = int(override.get(W_ILVL, '0'))
+                start = override.find(W_START_OVERRIDE)
+                if start is not None:
+                    starts[ilvl] = int(start.get(W_VAL))
+                levels.update(_parse_levels(override))
+            self.nums[num.get(W_NUMID)] = (abstract_id.get(W_VAL), starts, levels)
+
+    def level(self, num_id, ilvl):
+        """
+        功能 查找某个编号实例某一级的格式定义，找不到时返回None
+        """
+        num = self.nums.get(num_id)
+        if num is None:
+            return None
+        abstract_id, _, overrides = num
+        if ilvl in overrides:
+            return overrides[ilvl]
+        return self.abstracts.get(abstract_id, {}).get(ilvl)
+
+
+def format_number(value, fmt):
+    """
+    功能 按numFmt把编号数字格式化成字符串
+    """
+    if fmt in ('lowerLetter', 'upperLetter'):
+        # a..z, aa..zz, 与Word一致
+        letter = chr(ord('a') + (value - 1) % 26) * ((value - 1) // 26 + 1)
+        return letter.upper() if fmt == 'upperLetter' else letter
+    if fmt in ('lowerRoman', 'upperRoman'):
+        roman = []
+        for number, symbol in ROMAN:
+            while value >= number:
+                roman.append(symbol)
+                value -= number
+        roman = ''.join(roman)
+        return roman.upper() if fmt == 'upperRoman' else roman
+    if fmt == 'decimalZero':
+        return f"{value:02d}"
+    if fmt in ('chineseCounting', 'chineseCountingThousand', 'chineseLegalSimplified'):
+        return _chinese_number(value)
+    if fmt == 'ideographTraditional':
+        return IDEOGRAPH_TRADITIONAL[(value - 1) % 10]
+    if fmt == 'decimalEnclosedCircle' and 1 <= value <= 20:
+        return chr(0x2460 + value - 1)
+    if fmt == 'none':
+        return ''
+    return str(value)
+
+
+def _chinese_number(value):
+    if value < 10:
+        return CHINESE_DIGITS[value]
+    if value < 20:
+        return '十' + (CHINESE_DIGITS[value % 10] if value % 10 else '')
+    if value < 100:
+        return CHINESE_DIGITS[value // 10] + '十' + (CHINESE_DIGITS[value % 10] if value % 10 else '')
+    return str(value)
+
+
+class ListCounter:
+    """
+    功能 按文档顺序给编号段落计算标签的计数状态机
+    计数器按abstractNum共享，同一个列表被拆成多个numId时编号会接着往下数；
+    numId第一次出现时如果带有startOverride，对应级别从覆盖值重新开始
+    每个段落只更新固定的9个计数位，总耗时与段落数成线性
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.counters = {}
+        # startOverride生效前暂存的起始编号 abstractNumId->{ilvl: start}
+        self.pending_starts = {}
+        self.seen_nums = set()
+
+    def next(self, num_id, ilvl):
+        """
+        功能 推进一个编号段落的计数
+        参数 num_id:段落的numId ilvl:列表级别(从0开始)
+        返回 (label, ordered) label为计算出的编号文本，ordered为False表示项目符号列表。numId无效时返回None
+        """
+        num = self.index.nums.get(num_id)
+        level = self.index.level(num_id, ilvl)
+        if num is None or level is None:
+            return None
+        abstract_id, starts, _ = num
+
+        counters = self.counters.get(abstract_id)
+        if counters is None:
+            counters = self.counters[abstract_id] = [None] * MAX_LEVELS
+        pending = self.pending_starts.setdefault(abstract_id, {})
+        if num_id not in self.seen_nums:
+            self.seen_nums.add(num_id)
+            for restart_level, start in starts.items():
+                if restart_level < MAX_LEVELS:
+                    counters[restart_level] = None
+                    pending[restart_level] = start
+
+        ilvl = min(ilvl, MAX_LEVELS - 1)
+        if counters[ilvl] is None:
+            counters[ilvl] = pending.pop(ilvl, level.start)
+        else:
+            counters[ilvl] += 1
+        # 上一级编号变化后，下级编号重新开始
+        for deeper in range(ilvl + 1, MAX_LEVELS):
+            counters[deeper] = None
+
+        if level.fmt == 'bullet':
+            return level.text, False
+
+        label = level.text
+        for k in range(ilvl + 1):
+            placeholder = '%' + str(k + 1)
+            if placeholder not in label:
+                continue
+            k_level = self.index.level(num_id, k)
+            start = k_level.start if k_level is not None else 1
+            value = counters[k] if counters[k] is not None else start
+            fmt = 'decimal' if level.legal or k_level is None else k_level.fmt
+            label = label.replace(placeholder, format_number(value, fmt))
+        return label, True
@@ -0,0 +1,201 @@
+import os
+import re
+import json
+import html
+import hashlib
+from pathlib import Path
+
+from discovery import discover_documents, DEFAULT_EXCLUDE
+
+
+# 站点导航清单和service worker的文件名，都放在站点根目录
+MANIFEST_NAME = "site-manifest.json"
+SERVICE_WORKER_NAME = "sw.js"
+
+HEADING_PATTERN = re.compile(r'<h([1-6])(?: id="([^"]*)")?>(.*?)</h\1>', re.S)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def site_root_prefix(page_dir, root):
+    """
+    功能 计算从页面所在目录回到站点根目录的相对路径前缀，如 ../../
+    """
+    rel = os.path.relpath(root, page_dir).replace(os.sep, '/')
+    return '' if rel == '.' else rel + '/'
+
+
+def register_script(root_prefix):
+    """
+    功能 生成注册service worker的脚本，页面在哪一层目录都注册同一个根目录下的sw.js
+    """
+    return f"""
+    <script>
+        if ('serviceWorker' in navigator) {{
+            navigator.serviceWorker.register('{root_prefix}{SERVICE_WORKER_NAME}');
+        }}
+    </script>
+"""
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def page_outline(html_text):
+    """
+    功能 从生成的html中取出标题大纲 [级别, id, 标题]，id和标题还原成转义前的文本
+    """
+    outline = []
+    for level, anchor, text in HEADING_PATTERN.findall(html_text):
+        outline.append([int(level), html.unescape(anchor), html.unescape(TAG_PATTERN.sub('', text)).strip()])
+    return outline
+
+
+def build_manifest(root):
+    """
+    功能 扫描站点根目录下所有html页面，生成导航清单
+    与转换时一样跳过DEFAULT_EXCLUDE中的目录，node_modules、.git、备份目录里的html不会进入清单和预缓存
+    参数 root:站点根目录(Path)
+    返回 清单字典 version:所有页面哈希的汇总，任何页面变化都会改变 pages:文档页面 indexes:目录索引页
+    """
+    pages = []
+    indexes = []
+    for entry in discover_documents(root, include=['*.html'], exclude=DEFAULT_EXCLUDE):
+        path = Path(entry.path)
+        data = path.read_bytes()
+        url = entry.rel_path
+        if path.name == 'index.html':
+            indexes.append({'url': url, 'hash': content_hash(data)})
+        else:
+            pages.append({
+                'url': url,
+                'title': path.stem,
+                'hash': content_hash(data),
+                'outline': page_outline(data.decode('utf-8', errors='replace')),
+            })
+
+    version = hashlib.sha256()
+    for item in indexes + pages:
+        version.update((item['url'] + ':' + item['hash'] + '\n').encode('utf-8'))
+    return {'version': version.hexdigest()[:16], 'indexes': indexes, 'pages': pages}
+
+
+def write_offline_site(root):
+    """
+    功能 在站点根目录写出导航清单和service worker
+    参数 root:站点根目录(Path)
+    返回 导航清单
+    """
+    manifest = build_manifest(root)
+    (root / MANIFEST_NAME).write_text(
+        json.dumps(manifest, ensure_ascii=False, separators=(',', ':')), encoding="utf-8")
+
+    precache = [MANIFEST_NAME] + [item['url'] for item in manifest['indexes']]
+    script = SERVICE_WORKER_TEMPLATE \
+        .replace('__VERSION__', manifest['version']) \
+        .replace('__MANIFEST__', MANIFEST_NAME) \
+        .replace('__PRECACHE__', json.dumps(precache, ensure_ascii=False))
+    (root / SERVICE_WORKER_NAME).write_text(script, encoding="utf-8")
+    return manifest
+
+
+# service worker脚本模板
+# 外壳(导航清单和目录索引页)随版本号整体预缓存；文档页面访问过才缓存，
+# 之后每次访问先直接返回缓存，再在后台按清单里的内容哈希判断是否需要重新下载
+SERVICE_WORKER_TEMPLATE = """const VERSION = '__VERSION__';
+const SHELL_CACHE = 'docx-html-shell-' + VERSION;
+const PAGE_CACHE = 'docx-html-pages';
+const HASH_KEY = '__page-hashes__';
+const MANIFEST_URL = new URL('__MANIFEST__', self.registration.scope).href;
+const PRECACHE = __PRECACHE__.map(url => new URL(url, self.registration.scope).href);
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(SHELL_CACHE)
+            .then(cache => cache.addAll(PRECACHE))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys
+                .filter(key => key.startsWith('docx-html-shell-') && key !== SHELL_CACHE)
+                .map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+// 清单在一次service worker生命周期内只请求一次网络，失败时使用预缓存的版本
+let manifestPromise = null;
+function loadManifest() {
+    if (!manifestPromise) {
+        manifestPromise = fetch(MANIFEST_URL, { cache: 'no-cache' })
+            .then(response => {
+                if (!response.ok) throw new Error(response.status);
+                const copy = response.clone();
+                caches.open(SHELL_CACHE).then(cache => cache.put(MANIFEST_URL, copy));
+                return response.json();
+            })
+            .catch(() => caches.match(MANIFEST_URL).then(response => response ? response.json() : null))
+            .then(manifest => {
+                const hashes = {};
+                if (manifest) {
+                    manifest.indexes.concat(manifest.pages).forEach(item => {
+                        hashes[new URL(item.url, self.registration.scope).href] = item.hash;
+                    });
+                }
+                return hashes;
+            });
+    }
+    return manifestPromise;
+}
+
+async function storedHashes(cache) {
+    const response = await cache.match(HASH_KEY);
+    return response ? response.json() : {};
+}
+
+async function refresh(request, url, cache, hash) {
+    const response = await fetch(request, { cache: 'no-cache' });
+    if (response.ok) {
+        await cache.put(url, response.clone());
+        const hashes = await storedHashes(cache);
+        hashes[url] = hash;
+        await cache.put(HASH_KEY, new Response(JSON.stringify(hashes)));
+    }
+    return response;
+}
+
+async function handlePage(event, url) {
+    const cache = await caches.open(PAGE_CACHE);
+    const cached = await cache.match(url) || await caches.match(url);
+    const revalidate = Promise.all([loadManifest(), storedHashes(cache)])
+        .then(([latest, stored]) => {
+            const hash = latest[url];
+            if (!cached || hash === undefined || hash !== stored[url]) {
+                return refresh(event.request, url, cache, hash);
+            }
+            return null;
+        });
+
+    if (cached) {
+        // 内容哈希一致时什么都不用做；不一致时后台更新，下次访问生效
+        event.waitUntil(revalidate.catch(() => null));
+        return cached;
+    }
+    return revalidate;
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin || !url.pathname.endsWith('.html') && !url.pathname.endsWith('/')) return;
+    url.hash = '';
+    url.search = '';
+    if (url.pathname.endsWith('/')) url.pathname += 'index.html';
+    event.respondWith(handlePage(event, url.href));
+});
+"""
@@ -0,0 +1,151 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MemoryBudget:
+    """
+    功能 预读和异步写出共用的内存预算(字节)
+    单个文件超过预算时，只要当前没有别的占用也允许通过，避免大文件永远卡住
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.condition = threading.Condition()
+
+    def fits(self, size):
+        return self.used == 0 or self.used + size <= self.limit
+
+    def acquire(self, size, can_wait):
+        """
+        功能 占用size字节，预算不够且can_wait()为True时等待释放
+        """
+        with self.condition:
+            while not self.fits(size) and can_wait():
+                self.condition.wait()
+            self.used += size
+
+    def release(self, size):
+        with self.condition:
+            self.used -= size
+            self.condition.notify_all()
+
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def prefetch(items, budget, threads=4):
+    """
+    功能 用I/O线程提前读入后面几个文档的内容，读入的总字节数受budget限制
+    参数 items:(task, 文件路径, 预计大小) 的可迭代对象，大小取发现阶段缓存的stat结果
+         budget:MemoryBudget threads:读文件的线程数
+    返回 生成器，按原顺序产出(task, data, error)，读取失败时data为None。
+         产出的数据在调用方处理完、请求下一个之前一直计入预算
+    """
+    items = iter(items)
+    pending = deque()
+    upcoming = next(items, None)
+
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+        def fill():
+            nonlocal upcoming
+            while upcoming is not None:
+                task, path, size = upcoming
+                with budget.condition:
+                    if not budget.fits(size):
+                        if pending:
+                            return
+                        # 没有预读中的文档时必须等写出线程释放预算，否则流水线会提前结束
+                        budget.condition.wait_for(lambda: budget.fits(size))
+                    budget.used += size
+                pending.append((task, size, executor.submit(read_bytes, path)))
+                upcoming = next(items, None)
+
+        fill()
+        while pending:
+            task, size, future = pending.popleft()
+            try:
+                data, error = future.result(), None
+            except OSError as e:
+                data, error = None, f"{type(e).__name__}: {e}"
+            try:
+                yield task, data, error
+            finally:
+                del data
+                budget.release(size)
+            fill()
+
+
+class AsyncWriter:
+    """
+    功能 在后台线程里写出转换结果，转换下一个文档时磁盘同时在写上一个文档
+    待写内容的总字节数与预读共用同一个MemoryBudget
+    每个文档写完(或写失败)之后才产出结果，调用方不会在写出之前就把文档当成已完成
+    """
+
+    def __init__(self, budget, write):
+        self.budget = budget
+        self.write = write
+        self.queue = deque()
+        self.queue_bytes = 0
+        # 写出线程追加、调用方取走的 (task, error)，deque的append/popleft是线程安全的
+        self.results = deque()
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, task, outputs, size):
+        """
+        功能 提交一个文档的输出，预算不够时等待后台线程写完已排队的内容
+        参数 task:任务，写失败时原样记录 outputs:传给write的内容 size:内容的字节数
+        """
+        self.budget.acquire(size, lambda: self.queue_bytes > 0)
+        with self.condition:
+            self.queue.append((task, outputs, size))
+            self.queue_bytes += size
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if not self.queue:
+                    return
+                task, outputs, size = self.queue[0]
+            try:
+                self.write(task, outputs)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                error = None
+            self.results.append((task, error))
+            with self.condition:
+                self.queue.popleft()
+                self.queue_bytes -= size
+            self.budget.release(size)
+
+    def completed(self):
+        """
+        功能 取走目前已经写完的文档
+        返回 [(task, error)]，写成功时error为None
+        """
+        results = []
+        while self.results:
+            results.append(self.results.popleft())
+        return results
+
+    def close(self):
+        """
+        功能 等待所有排队的内容写完
+        返回 尚未取走的 [(task, error)]
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+        return self.completed()
@@ -0,0 +1,134 @@
+import os
+import json
+import hashlib
+
+from docx_xml import W_PPR, W_PSTYLE, W_OUTLINE, W_VAL, numbering_properties
+
+
+# 缓存文件格式版本，StyleTable的字段或样式解析逻辑变化时加1，旧缓存自动失效
+CACHE_VERSION = 1
+
+# 每个样式展开后保存的字段，顺序即缓存文件中列表的顺序
+FIELDS = ('outline', 'left_indent', 'right_indent', 'first_line_indent', 'num_id', 'ilvl')
+
+
+class StyleTable:
+    """
+    功能 一份styles.xml展开继承链之后的样式表，段落只需要查一次字典，不再逐级访问base_style
+    default_style_id:默认段落样式 styles:样式id->与FIELDS对应的列表
+    """
+    __slots__ = ('default_style_id', 'styles')
+
+    def __init__(self, default_style_id, styles):
+        self.default_style_id = default_style_id
+        self.styles = styles
+
+    def style_of(self, p):
+        """
+        功能 取段落实际使用的样式，没有设置或样式不存在时与python-docx一样使用默认段落样式
+        """
+        style = p.find(W_PPR + '/' + W_PSTYLE)
+        style_id = style.get(W_VAL) if style is not None else None
+        resolved = self.styles.get(style_id)
+        if resolved is None:
+            resolved = self.styles.get(self.default_style_id)
+        return resolved
+
+    def outline_level(self, p, text):
+        """
+        功能 与isTitle相同的判断，段落自身的outlineLvl优先，其次是展开后的样式
+        """
+        if text.strip() == '':
+            return None
+        outline = p.find(W_PPR + '/' + W_OUTLINE)
+        if outline is not None:
+            return int(outline.get(W_VAL)) + 1
+        style = self.style_of(p)
+        return style[0] if style is not None else None
+
+    def indent(self, p, indent_attr):
+        """
+        功能 样式沿继承链生效的缩进值(磅)，段落自身的缩进由调用方先检查
+        """
+        style = self.style_of(p)
+        if style is None:
+            return None
+        return style[FIELDS.index(indent_attr)]
+
+    def numbering(self, p):
+        """
+        功能 与get_numbering相同的判断，段落自身的numPr优先，缺少的项从展开后的样式补全
+        """
+        num_id, ilvl = numbering_properties(p)
+        if num_id is None or ilvl is None:
+            style = self.style_of(p)
+            if style is not None:
+                if num_id is None:
+                    num_id = style[4]
+                if ilvl is None:
+                    ilvl = style[5]
+        if num_id is None or num_id == '0':
+            return None
+        return num_id, ilvl or 0
+
+    def to_json(self):
+        return {'version': CACHE_VERSION, 'default': self.default_style_id, 'styles': self.styles}
+
+    @classmethod
+    def from_json(cls, data):
+        if data.get('version') != CACHE_VERSION:
+            return None
+        return cls(data['default'], data['styles'])
+
+
+class StyleTableCache:
+    """
+    功能 按styles.xml摘要缓存展开后的样式表
+    同一次批量转换中，同一个进程内的文档共用内存里的样式表；设置了cache_dir时还会写到磁盘，
+    并行的子进程和之后的运行都可以直接读取。写入时先写到带进程号的临时文件再改名，
+    多个进程同时写同一个摘要也不会读到半个文件
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.tables = {}
+
+    def get(self, styles_xml, build):
+        """
+        功能 取styles.xml对应的样式表，缓存中没有时调用build()生成
+        参数 styles_xml:styles.xml内容(bytes) build:生成StyleTable的函数
+        返回 StyleTable
+        """
+        digest = hashlib.sha1(styles_xml).hexdigest()
+        table = self.tables.get(digest)
+        if table is not None:
+            return table
+
+        path = None
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir, 'styles', digest + '.json')
+            table = self._load(path)
+
+        if table is None:
+            table = build()
+            if path is not None:
+                self._save(path, table)
+
+        self.tables[digest] = table
+        return table
+
+    @staticmethod
+    def _load(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return StyleTable.from_json(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @staticmethod
+    def _save(path, table):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(table.to_json(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)